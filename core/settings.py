@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from os.path import join
+from os import environ
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,11 +44,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'mentorados.middleware.ConsultasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'mentorados.middleware.MentoradoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -75,12 +78,108 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Perfil escolhido por DB_PERFIL: 'sqlite' (padrão; configuração do Django),
+# 'sqlite-wal' (WAL e pragmas para escrita concorrente) ou 'postgres'
+# (requer psycopg[pool])
+
+DB_PERFIL = environ.get('DB_PERFIL', 'sqlite')
+
+if DB_PERFIL == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': environ.get('DB_NOME', 'mentorfy'),
+            'USER': environ.get('DB_USUARIO', 'postgres'),
+            'PASSWORD': environ.get('DB_SENHA', ''),
+            'HOST': environ.get('DB_HOST', 'localhost'),
+            'PORT': environ.get('DB_PORTA', '5432'),
+            # O pool substitui as conexões persistentes (CONN_MAX_AGE deve ser 0)
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(environ.get('DB_POOL_MIN', 2)),
+                    'max_size': int(environ.get('DB_POOL_MAX', 10)),
+                    'timeout': 10,
+                },
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': environ.get('DB_NOME', BASE_DIR / 'db.sqlite3'),
+            # Conexões persistentes só no perfil WAL, salvo DB_CONN_MAX_AGE
+            'CONN_MAX_AGE': int(environ.get('DB_CONN_MAX_AGE', 60 if DB_PERFIL == 'sqlite-wal' else 0)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if DB_PERFIL == 'sqlite-wal':
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA busy_timeout={int(environ.get('DB_BUSY_TIMEOUT', 5000))};"
+                f"PRAGMA mmap_size={int(environ.get('DB_MMAP_SIZE', 134217728))};"
+            ),
+            # Reserva a escrita no início da transação e evita "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+
+# Cache por CACHE_URL: redis://host:porta/0 (requer redis) ou
+# memcached://host:porta (requer pymemcache). Sem CACHE_URL o cache é
+# LocMemCache, por processo: com vários workers uma invalidação não chega aos
+# demais, então o cache de páginas, de usuários e de tokens fica desligado.
+# O custo é uma consulta a mais por requisição: o token (ou a sessão
+# assinada) do mentorado e o usuário do mentor são lidos do banco. Em
+# produção defina CACHE_URL.
+
+CACHE_URL = environ.get('CACHE_URL', '')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': CACHE_URL.removeprefix('memcached://')}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+# Sessões por SESSAO_PERFIL: 'cached_db' (cache com o banco como reserva;
+# padrão com CACHE_URL), 'db' (padrão do Django, e o padrão sem cache
+# compartilhado: um logout num worker não limparia o cache dos outros) ou
+# 'assinada' (cookie assinado, sem consulta, mas sem revogação no servidor)
+
+SESSAO_PERFIL = environ.get('SESSAO_PERFIL', 'cached_db' if CACHE_URL else 'db')
+
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'assinada': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSAO_PERFIL]
+
+# request.user lido do cache e invalidado quando o usuário é salvo (só com
+# cache compartilhado; sem ele, uma consulta por requisição). O ModelBackend
+# continua na lista para as sessões abertas antes do CacheUserBackend, que
+# guardam o caminho dele; elas passam pelo cache após o próximo login
+
+AUTHENTICATION_BACKENDS = [
+    'usuarios.backends.CacheUserBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+USUARIO_CACHE_TTL = 300
+
+# Limite de tentativas que falham em login (por IP e por usuário + IP) e no
+# auth do mentorado (por IP); limites em usuarios.limite.LIMITES.
+# BaldeMemoria vale por processo; com vários workers use
+# 'usuarios.limite.BaldeCache' e um cache compartilhado (CACHE_URL).
+
+LIMITE_BACKEND = 'usuarios.limite.BaldeMemoria'
+
+# Quantidade de proxies confiáveis à frente da aplicação (0: REMOTE_ADDR);
+# o IP do cliente é lido da direita do X-Forwarded-For
+LIMITE_PROXIES_CONFIAVEIS = 0
 
 
 # Password validation
@@ -139,4 +238,60 @@ MESSAGE_TAGS = {
 
 # Login required
 
-LOGIN_URL = '/usuarios/login/'
\ No newline at end of file
+LOGIN_URL = '/usuarios/login/'
+
+# Sessão dos mentorados: cookie assinado e com validade em vez do token.
+# Só fica fora do banco com cache compartilhado (CACHE_URL); sem ele cada
+# requisição confere a versão do token no banco (aviso mentorados.W001)
+
+MENTORADO_SESSAO_ASSINADA = False
+MENTORADO_SESSAO_MAX_AGE = 3600
+
+# Gráfico e série de estágios (segundos em cache; só com cache compartilhado)
+
+MENTORADO_GRAFICO_TTL = 3600
+
+# Agenda
+
+MENTORADO_DIAS_HORIZONTE = 60
+MENTORADO_DATAS_CACHE_TTL = 300
+
+# Upload de vídeos em partes
+
+MENTORADO_UPLOAD_CHUNK_MAX = 8 * 1024 * 1024
+# Arquivos .part em gravação: fora do MEDIA_ROOT (não são servidos) e, para a
+# finalização ser um rename atômico, no mesmo sistema de arquivos
+MENTORADO_UPLOAD_PARCIAL_DIR = join(BASE_DIR, 'uploads_parciais')
+# Uploads parciais parados há mais tempo que isto (segundos) são removidos
+# por python manage.py limpa_uploads
+MENTORADO_UPLOAD_EXPIRA = 24 * 3600
+
+
+# Envio dos vídeos: None (Django), 'x-accel' (nginx) ou 'x-sendfile' (apache)
+
+MENTORADO_MEDIA_ENVIO = None
+MENTORADO_MEDIA_ACCEL_PREFIXO = '/media-protegida/'
+
+# Processamento dos uploads (python manage.py processa_uploads). Os
+# processadores ficam em mentorados.processadores.PROCESSADORES; defina
+# MENTORADO_PROCESSADORES só para substituir a lista.
+
+
+# Monitoramento de consultas por view: ativo com DEBUG ou com
+# MENTORADO_MONITORA_CONSULTAS = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'mentorados.consultas': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+# Cache das páginas do mentor (invalidado pela versão do mentor); só com
+# cache compartilhado (CACHE_URL)
+
+MENTORADO_CACHE_PAGINAS_TTL = 600
\ No newline at end of file
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MentoradosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mentorados'
+
+    def ready(self):
+        from . import signals, checks
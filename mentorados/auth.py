@@ -1,4 +1,156 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
 from .models import Mentorados
+from .cache import cache_compartilhado
+
+SALT_SESSAO = 'mentorados.sessao'
+LIMITE_CHAVES = 20
+
+class CacheTokens:
+    # Mentorado por valor do cookie, no cache compartilhado. Sem ele nada é
+    # guardado e cada requisição do mentorado consulta o banco: num cache por
+    # processo a troca do token num worker não chegaria aos outros, que
+    # continuariam aceitando o token antigo até o TTL
+    def __init__(self, ttl):
+        self.ttl = ttl
+
+    def chave(self, valor):
+        # O token não vira nome de chave no cache
+        return f'mentorados:token:{salted_hmac(SALT_SESSAO, valor).hexdigest()}'
+
+    def chave_mentorado(self, pk):
+        # Chaves de cada mentorado, para invalidar sem conhecer o valor do cookie
+        return f'mentorados:token:chaves:{pk}'
+
+    def get(self, valor):
+        if not cache_compartilhado():
+            return None
+        return cache.get(self.chave(valor))
+
+    async def aget(self, valor):
+        if not cache_compartilhado():
+            return None
+        return await cache.aget(self.chave(valor))
+
+    def set(self, valor, mentorado):
+        if not cache_compartilhado():
+            return
+        chave = self.chave(valor)
+        cache.set(chave, mentorado, timeout=self.ttl)
+        chaves = cache.get(self.chave_mentorado(mentorado.pk)) or []
+        if chave not in chaves:
+            # Poucos cookies ativos por mentorado; os mais antigos expiram sozinhos
+            cache.set(self.chave_mentorado(mentorado.pk), (chaves + [chave])[-LIMITE_CHAVES:], timeout=self.ttl)
+
+    async def aset(self, valor, mentorado):
+        await sync_to_async(self.set)(valor, mentorado)
+
+    def invalida(self, mentorado):
+        if not cache_compartilhado():
+            return
+        chaves = cache.get(self.chave_mentorado(mentorado.pk)) or []
+        cache.delete_many(chaves + [self.chave_mentorado(mentorado.pk)])
+        if mentorado.token:
+            cache.delete(self.chave(mentorado.token))
+
+cache_tokens = CacheTokens(ttl=getattr(settings, 'MENTORADO_TOKEN_CACHE_TTL', 300))
+
+def sessao_assinada():
+    return getattr(settings, 'MENTORADO_SESSAO_ASSINADA', False)
+
+def sessao_max_age():
+    return getattr(settings, 'MENTORADO_SESSAO_MAX_AGE', 3600)
+
+def versao_token(token):
+    # Derivada do token sem expô-lo no cookie
+    return salted_hmac(SALT_SESSAO, token).hexdigest()[:12]
+
+def chave_revogacao(mentorado_id, versao):
+    return f'mentorados:sessao_revogada:{mentorado_id}:{versao}'
+
+def assina_sessao(mentorado):
+    return signing.dumps({'id': mentorado.pk, 'v': versao_token(mentorado.token)}, salt=SALT_SESSAO)
+
+# A lista de revogação só vale em todos os workers com cache compartilhado.
+# Sem ele, cache_tokens não guarda nada e valida_sessao compara a versão do
+# cookie com o token do banco a cada requisição: a troca do token revoga a
+# sessão na hora, em qualquer worker.
+
+def assinatura_sessao(valor):
+    try:
+        return signing.loads(valor, salt=SALT_SESSAO, max_age=sessao_max_age())
+    except signing.BadSignature:
+        return None
+
+def le_sessao(valor):
+    dados = assinatura_sessao(valor)
+    if dados is None or cache.get(chave_revogacao(dados['id'], dados['v'])):
+        return None
+    return dados
+
+async def ale_sessao(valor):
+    dados = assinatura_sessao(valor)
+    if dados is None or await cache.aget(chave_revogacao(dados['id'], dados['v'])):
+        return None
+    return dados
+
+def revoga_sessao(mentorado_id, token):
+    # Basta durar o tempo máximo de vida do cookie
+    if token and cache_compartilhado():
+        cache.set(chave_revogacao(mentorado_id, versao_token(token)), True, timeout=sessao_max_age())
+
+def valor_cookie(mentorado):
+    if sessao_assinada():
+        return assina_sessao(mentorado)
+    return mentorado.token
 
 def valida_token(token):
-    return Mentorados.objects.filter(token=token).first()
+    if not token:
+        return None
+    if sessao_assinada():
+        return valida_sessao(token)
+    mentorado = cache_tokens.get(token)
+    if mentorado is None:
+        mentorado = Mentorados.objects.filter(token=token).first()
+        if mentorado is not None:
+            cache_tokens.set(token, mentorado)
+    return mentorado
+
+def valida_sessao(valor):
+    dados = le_sessao(valor)
+    if dados is None:
+        return None
+    mentorado = cache_tokens.get(valor)
+    if mentorado is None:
+        mentorado = Mentorados.objects.filter(id=dados['id']).first()
+        if mentorado is None or versao_token(mentorado.token) != dados['v']:
+            return None
+        cache_tokens.set(valor, mentorado)
+    return mentorado
+
+async def avalida_token(token):
+    if not token:
+        return None
+    if sessao_assinada():
+        return await avalida_sessao(token)
+    mentorado = await cache_tokens.aget(token)
+    if mentorado is None:
+        mentorado = await Mentorados.objects.filter(token=token).afirst()
+        if mentorado is not None:
+            await cache_tokens.aset(token, mentorado)
+    return mentorado
+
+async def avalida_sessao(valor):
+    dados = await ale_sessao(valor)
+    if dados is None:
+        return None
+    mentorado = await cache_tokens.aget(valor)
+    if mentorado is None:
+        mentorado = await Mentorados.objects.filter(id=dados['id']).afirst()
+        if mentorado is None or versao_token(mentorado.token) != dados['v']:
+            return None
+        await cache_tokens.aset(valor, mentorado)
+    return mentorado
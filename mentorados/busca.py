@@ -0,0 +1,106 @@
+import re
+from django.db import connection, transaction
+from .models import IndiceBusca, TipoBusca, Mentorados, Reuniao, Tarefa, Tag
+
+TERMO = re.compile(r'\w+')
+MAX_TERMOS = 10
+
+TIPOS = {Mentorados: TipoBusca.MENTORADO, Reuniao: TipoBusca.REUNIAO, Tarefa: TipoBusca.TAREFA}
+
+BUSCA_FTS = '''
+    SELECT rowid FROM busca_fts
+    WHERE busca_fts MATCH %s
+    ORDER BY bm25(busca_fts, 1.0, 0.0)
+    LIMIT %s OFFSET %s
+'''
+
+def fts_disponivel():
+    # A tabela só existe no SQLite com FTS5 (migração 0011)
+    if connection.vendor != 'sqlite':
+        return False
+    if not hasattr(connection, '_busca_fts'):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'busca_fts'")
+            connection._busca_fts = cursor.fetchone() is not None
+    return connection._busca_fts
+
+def texto_reuniao(descricao, tag):
+    return f'{Tag(tag).label} {descricao}'
+
+def documento(objeto):
+    if isinstance(objeto, Mentorados):
+        return TipoBusca.MENTORADO, objeto.user_id, objeto.pk, objeto.nome
+    if isinstance(objeto, Reuniao):
+        return TipoBusca.REUNIAO, objeto.data.mentor_id, objeto.mentorado_id, texto_reuniao(objeto.descricao, objeto.tag)
+    if isinstance(objeto, Tarefa):
+        return TipoBusca.TAREFA, objeto.mentorado.user_id, objeto.mentorado_id, objeto.tarefa
+    raise TypeError(f'{type(objeto).__name__} não é indexado.')
+
+def indexa(objeto):
+    tipo, mentor_id, mentorado_id, texto = documento(objeto)
+    IndiceBusca.objects.update_or_create(
+        tipo=tipo, objeto_id=objeto.pk,
+        defaults={'mentor_id': mentor_id, 'mentorado_id': mentorado_id, 'texto': texto}
+    )
+
+def remove_indice(objeto):
+    IndiceBusca.objects.filter(tipo=TIPOS[type(objeto)], objeto_id=objeto.pk).delete()
+
+def indexa_mentorados(mentorados):
+    # Para caminhos com bulk_create, que não disparam post_save
+    IndiceBusca.objects.bulk_create([
+        IndiceBusca(tipo=TipoBusca.MENTORADO, objeto_id=m.pk, mentor_id=m.user_id, mentorado_id=m.pk, texto=m.nome)
+        for m in mentorados
+    ])
+
+def documentos():
+    # Todos os documentos, lidos com values() para não instanciar os modelos
+    for id, user_id, nome in Mentorados.objects.values_list('id', 'user_id', 'nome').iterator():
+        yield IndiceBusca(tipo=TipoBusca.MENTORADO, objeto_id=id, mentor_id=user_id, mentorado_id=id, texto=nome)
+    for id, mentor_id, mentorado_id, descricao, tag in Reuniao.objects.values_list('id', 'data__mentor_id', 'mentorado_id', 'descricao', 'tag').iterator():
+        yield IndiceBusca(tipo=TipoBusca.REUNIAO, objeto_id=id, mentor_id=mentor_id, mentorado_id=mentorado_id, texto=texto_reuniao(descricao, tag))
+    for id, user_id, mentorado_id, tarefa in Tarefa.objects.values_list('id', 'mentorado__user_id', 'mentorado_id', 'tarefa').iterator():
+        yield IndiceBusca(tipo=TipoBusca.TAREFA, objeto_id=id, mentor_id=user_id, mentorado_id=mentorado_id, texto=tarefa)
+
+def reconstroi_indice(tamanho_lote=1000):
+    with transaction.atomic():
+        IndiceBusca.objects.all().delete()
+        lote = []
+        for doc in documentos():
+            lote.append(doc)
+            if len(lote) >= tamanho_lote:
+                IndiceBusca.objects.bulk_create(lote)
+                lote = []
+        IndiceBusca.objects.bulk_create(lote)
+        if fts_disponivel():
+            # Refaz o FTS a partir da tabela de conteúdo e compacta os segmentos
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO busca_fts(busca_fts) VALUES ('rebuild')")
+                cursor.execute("INSERT INTO busca_fts(busca_fts) VALUES ('optimize')")
+    return IndiceBusca.objects.count()
+
+def termos(consulta):
+    return TERMO.findall(consulta.lower())[:MAX_TERMOS]
+
+def busca(user, consulta, pagina=1, tamanho=20):
+    # Resultados da página e se há uma próxima; ordenados por relevância no FTS5
+    palavras = termos(consulta)
+    if not palavras:
+        return [], False
+    inicio = (pagina - 1) * tamanho
+
+    if fts_disponivel():
+        # Cada termo vira um prefixo entre aspas: a sintaxe do FTS5 não chega do usuário
+        expressao = f'mentor_id:"{user.id}" AND texto:(' + ' '.join(f'"{p}"*' for p in palavras) + ')'
+        with connection.cursor() as cursor:
+            cursor.execute(BUSCA_FTS, [expressao, tamanho + 1, inicio])
+            ids = [linha[0] for linha in cursor.fetchall()]
+        por_id = IndiceBusca.objects.in_bulk(ids)
+        resultados = [por_id[id] for id in ids if id in por_id]
+    else:
+        resultados = IndiceBusca.objects.filter(mentor=user)
+        for palavra in palavras:
+            resultados = resultados.filter(texto__icontains=palavra)
+        resultados = list(resultados.order_by('-id')[inicio:inicio + tamanho + 1])
+
+    return resultados[:tamanho], len(resultados) > tamanho
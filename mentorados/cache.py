@@ -0,0 +1,212 @@
+import hashlib
+from time import time_ns
+from datetime import timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib import messages
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.db.models import Count
+from django.db.models.functions import TruncDate, TruncDay, TruncWeek, TruncMonth
+from datetime import date, datetime, timedelta
+from .models import Mentorados, Estagios, DisponibilidadeHorarios
+
+CACHES_LOCAIS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+def cache_compartilhado():
+    # Invalidações por chave só valem se todos os workers enxergam o mesmo cache
+    return settings.CACHES['default']['BACKEND'] not in CACHES_LOCAIS
+
+def chave_grafico(user_id):
+    return f'mentorados:grafico:{user_id}'
+
+def grafico_estagios(user):
+    # Em cache só se compartilhado: num cache por processo a invalidação feita
+    # por um worker não chega aos outros, que serviriam o gráfico antigo
+    compartilhado = cache_compartilhado()
+    chave = chave_grafico(user.id)
+    grafico = cache.get(chave) if compartilhado else None
+    if grafico is not None:
+        return grafico
+
+    # Uma única consulta agrupada por estágio
+    contagem = dict(
+        Mentorados.objects.filter(user=user)
+        .order_by()
+        .values_list('estagio')
+        .annotate(qtd=Count('id'))
+    )
+    grafico = {
+        'estagios': [label for _, label in Estagios.choices],
+        'qtd_estagio': [contagem.get(valor, 0) for valor, _ in Estagios.choices]
+    }
+    if compartilhado:
+        cache.set(chave, grafico, timeout=getattr(settings, 'MENTORADO_GRAFICO_TTL', 3600))
+    return grafico
+
+AGRUPAMENTOS = {
+    'dia': TruncDay,
+    'semana': TruncWeek,
+    'mes': TruncMonth
+}
+
+def chave_grafico_alterado(user_id):
+    return f'mentorados:grafico:alterado:{user_id}'
+
+def invalida_grafico(user_id):
+    cache.delete(chave_grafico(user_id))
+    cache.set(chave_grafico_alterado(user_id), time_ns(), timeout=None)
+
+def grafico_alterado_em(user_id):
+    # Marca de tempo (ns) da última alteração nos mentorados do mentor
+    chave = chave_grafico_alterado(user_id)
+    alterado = cache.get(chave)
+    if alterado is None:
+        cache.add(chave, time_ns(), timeout=None)
+        alterado = cache.get(chave)
+    return alterado
+
+def ultima_alteracao_grafico(user_id):
+    return datetime.fromtimestamp(grafico_alterado_em(user_id) // 10**9, tz=timezone.utc)
+
+def serie_estagios(user, agrupamento, dias):
+    # Novos mentorados por período (criado_em) e estágio, agrupados no banco
+    # A data entra na chave: a janela de dias avança à meia-noite. Como em
+    # grafico_estagios, só há cache se ele for compartilhado
+    hoje = date.today()
+    compartilhado = cache_compartilhado()
+    if compartilhado:
+        chave = f'mentorados:grafico:serie:{user.id}:{grafico_alterado_em(user.id)}:{agrupamento}:{dias}:{hoje.isoformat()}'
+        serie = cache.get(chave)
+        if serie is not None:
+            return serie
+
+    inicio = hoje - timedelta(days=dias)
+    linhas = (
+        Mentorados.objects.filter(user=user, criado_em__gte=inicio)
+        .annotate(periodo=AGRUPAMENTOS[agrupamento]('criado_em'))
+        .order_by()
+        .values_list('periodo', 'estagio')
+        .annotate(qtd=Count('id'))
+    )
+    contagem = {}
+    for periodo, estagio, qtd in linhas:
+        contagem.setdefault(periodo, {})[estagio] = qtd
+
+    periodos = sorted(contagem)
+    serie = {
+        'periodos': [periodo.isoformat() for periodo in periodos],
+        'series': [
+            {'estagio': label, 'qtd': [contagem[periodo].get(valor, 0) for periodo in periodos]}
+            for valor, label in Estagios.choices
+        ]
+    }
+    if compartilhado:
+        cache.set(chave, serie, timeout=getattr(settings, 'MENTORADO_GRAFICO_TTL', 3600))
+    return serie
+
+def chave_datas(mentor_id):
+    return f'mentorados:datas:{mentor_id}'
+
+def consulta_datas(mentor_id):
+    agora = datetime.now()
+    horizonte = getattr(settings, 'MENTORADO_DIAS_HORIZONTE', 60)
+    # Datas distintas e ordenadas calculadas pelo banco
+    return (
+        DisponibilidadeHorarios.objects.filter(
+            mentor_id=mentor_id,
+            data_inicial__gte=agora,
+            data_inicial__lt=agora + timedelta(days=horizonte),
+            agendado=False
+        )
+        .annotate(dia=TruncDate('data_inicial'))
+        .order_by('dia')
+        .values_list('dia', flat=True)
+        .distinct()
+    )
+
+def datas_disponiveis(mentor_id):
+    chave = chave_datas(mentor_id)
+    datas = cache.get(chave)
+    if datas is not None:
+        return datas
+
+    datas = list(consulta_datas(mentor_id))
+    # Expira sozinho para não exibir dias que já passaram
+    cache.set(chave, datas, timeout=getattr(settings, 'MENTORADO_DATAS_CACHE_TTL', 300))
+    return datas
+
+async def adatas_disponiveis(mentor_id):
+    chave = chave_datas(mentor_id)
+    datas = await cache.aget(chave)
+    if datas is not None:
+        return datas
+
+    datas = [dia async for dia in consulta_datas(mentor_id)]
+    await cache.aset(chave, datas, timeout=getattr(settings, 'MENTORADO_DATAS_CACHE_TTL', 300))
+    return datas
+
+def invalida_datas(mentor_id):
+    cache.delete(chave_datas(mentor_id))
+
+def chave_versao(user_id):
+    return f'mentorados:versao:{user_id}'
+
+def versao_mentor(user_id):
+    chave = chave_versao(user_id)
+    versao = cache.get(chave)
+    if versao is None:
+        # Versão nova (e não reaproveitada) se a anterior foi descartada do cache
+        cache.add(chave, time_ns(), timeout=None)
+        versao = cache.get(chave)
+    return versao
+
+def incrementa_versao(user_id):
+    try:
+        cache.incr(chave_versao(user_id))
+    except ValueError:
+        cache.set(chave_versao(user_id), time_ns(), timeout=None)
+
+class CacheVersionadoMixin:
+    # GET do mentor servido do cache enquanto a versão dele não mudar. Só para
+    # páginas que dependem apenas do banco (nada de datetime.now()), e só com
+    # cache compartilhado: num cache por processo a versão incrementada por um
+    # worker não invalida as páginas dos outros
+    def chave_pagina(self, request):
+        csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+        # O HTML leva o token CSRF: só reaproveita com o mesmo cookie
+        if not csrf or messages.get_messages(request):
+            return None
+        sufixo = hashlib.md5(f'{request.get_full_path()}:{csrf}'.encode()).hexdigest()
+        return f'mentorados:pagina:{request.user.id}:{versao_mentor(request.user.id)}:{sufixo}'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or not request.user.is_authenticated or not cache_compartilhado():
+            return super().dispatch(request, *args, **kwargs)
+        chave = self.chave_pagina(request)
+        if chave is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        pagina = cache.get(chave)
+        if pagina is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            pagina = {
+                'conteudo': response.content,
+                'content_type': response['Content-Type'],
+                'etag': f'"{hashlib.md5(response.content).hexdigest()}"'
+            }
+            cache.set(chave, pagina, timeout=getattr(settings, 'MENTORADO_CACHE_PAGINAS_TTL', 600))
+        else:
+            response = HttpResponse(pagina['conteudo'], content_type=pagina['content_type'])
+
+        response['ETag'] = pagina['etag']
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Cookie',))
+        return get_conditional_response(request, etag=pagina['etag'], response=response)
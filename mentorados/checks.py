@@ -0,0 +1,15 @@
+from django.core.checks import Warning, register
+from .auth import sessao_assinada
+from .cache import cache_compartilhado
+
+@register()
+def sessao_assinada_sem_cache(app_configs, **kwargs):
+    # Sem cache compartilhado a sessão assinada ainda é conferida no banco:
+    # é o que garante a revogação em todos os workers quando o token muda
+    if sessao_assinada() and not cache_compartilhado():
+        return [Warning(
+            'Sessões assinadas de mentorados sem cache compartilhado consultam o banco a cada requisição.',
+            hint='Defina CACHE_URL (Redis ou Memcached) para validar a sessão e a revogação sem consulta.',
+            id='mentorados.W001',
+        )]
+    return []
@@ -0,0 +1,87 @@
+import csv
+import json
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Mentorados, Reuniao, Tarefa
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+
+class Exportacao:
+    # colunas: (nome no arquivo, caminho no values())
+    def __init__(self, queryset, colunas):
+        self.queryset = queryset
+        self.colunas = colunas
+
+    def para(self, user):
+        # values() e não values_list(): o iterável deste executa a consulta ao ser criado,
+        # o que o aiterator() faria fora de uma thread
+        return self.queryset(user).values(*self.caminhos)
+
+    @property
+    def caminhos(self):
+        return [caminho for _, caminho in self.colunas]
+
+    @property
+    def cabecalho(self):
+        return [nome for nome, _ in self.colunas]
+
+EXPORTACOES = {
+    # Mesmas colunas aceitas pela importação
+    'mentorados': Exportacao(
+        lambda user: Mentorados.objects.filter(user=user).order_by('id'),
+        [('id', 'id'), ('nome', 'nome'), ('estagio', 'estagio'), ('navigator', 'navigator__nome'), ('criado_em', 'criado_em')]
+    ),
+    'reunioes': Exportacao(
+        lambda user: Reuniao.objects.filter(data__mentor=user).order_by('data__data_inicial', 'id'),
+        [('id', 'id'), ('data_inicial', 'data__data_inicial'), ('mentorado_id', 'mentorado_id'), ('mentorado', 'mentorado__nome'), ('tag', 'tag'), ('descricao', 'descricao')]
+    ),
+    'tarefas': Exportacao(
+        lambda user: Tarefa.objects.filter(mentorado__user=user).order_by('mentorado_id', 'id'),
+        [('id', 'id'), ('mentorado_id', 'mentorado_id'), ('mentorado', 'mentorado__nome'), ('tarefa', 'tarefa'), ('realizada', 'realizada')]
+    )
+}
+
+def tamanho_lote():
+    return getattr(settings, 'MENTORADO_EXPORTACAO_LOTE', 2000)
+
+# Planilhas executam células que começam com estes caracteres como fórmula
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+def protege_celula(valor):
+    # O apóstrofo faz a planilha tratar a célula como texto
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+class Eco:
+    # O csv.writer "grava" aqui e recebe a linha de volta, sem buffer
+    def write(self, valor):
+        return valor
+
+def serializa(exportacao, formato):
+    cabecalho, caminhos = exportacao.cabecalho, exportacao.caminhos
+    if formato == 'csv':
+        escritor = csv.writer(Eco())
+        return escritor.writerow(cabecalho), lambda dados: escritor.writerow([protege_celula(dados[c]) for c in caminhos])
+    return None, lambda dados: json.dumps(
+        {nome: dados[c] for nome, c in zip(cabecalho, caminhos)}, cls=DjangoJSONEncoder, ensure_ascii=False
+    ) + '\n'
+
+def linhas(exportacao, user, formato, lote=None):
+    # O cabeçalho sai antes da consulta; depois, um lote do cursor por vez
+    primeira, linha = serializa(exportacao, formato)
+    if primeira:
+        yield primeira
+    for dados in exportacao.para(user).iterator(chunk_size=lote or tamanho_lote()):
+        yield linha(dados)
+
+async def alinhas(exportacao, user, formato, lote=None):
+    # Sob ASGI um iterador síncrono seria consumido inteiro antes do envio
+    primeira, linha = serializa(exportacao, formato)
+    if primeira:
+        yield primeira
+    async for dados in exportacao.para(user).aiterator(chunk_size=lote or tamanho_lote()):
+        yield linha(dados)
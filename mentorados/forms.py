@@ -1,8 +1,12 @@
 from django import forms
 from .models import Mentorados, Navigators, DisponibilidadeHorarios, Reuniao, Tarefa, Upload
-from django.utils.timezone import timedelta
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from datetime import datetime
+from .horarios import DURACAO, expande_recorrencia, cria_horarios_recorrentes
+from .processamento import enfileira
+from .cache import invalida_datas
+from .resumo import aplica
 
 class MentoradosCadastroForm(forms.ModelForm):
     class Meta:
@@ -26,6 +30,16 @@ class MentoradosCadastroForm(forms.ModelForm):
         mentorado.save()
         return mentorado
     
+def conflito_horario(user, data):
+    # Consulta por intervalo coberta pelo índice (mentor, data_inicial, agendado).
+    # Intervalo aberto, como em horarios.remove_conflitos: horários encostados
+    # (13:00 e 13:50) não conflitam
+    return DisponibilidadeHorarios.objects.filter(
+        mentor=user,
+        data_inicial__gt=data - DURACAO,
+        data_inicial__lt=data + DURACAO
+    )
+
 class DisponibilidadeHorarioForm(forms.ModelForm):
     class Meta:
         model = DisponibilidadeHorarios
@@ -40,12 +54,7 @@ class DisponibilidadeHorarioForm(forms.ModelForm):
 
     def clean_data_inicial(self):
         data = self.cleaned_data.get('data_inicial')
-        disponibilidade = DisponibilidadeHorarios.objects.filter(mentor=self.user).filter(
-            data_inicial__gte=(data - timedelta(minutes=50)),
-            data_inicial__lte=(data + timedelta(minutes=50))
-        )
-
-        if disponibilidade.exists():
+        if conflito_horario(self.user, data).exists():
             raise ValidationError('Você já possui uma reunião em aberto.')
         
         return data
@@ -57,15 +66,65 @@ class DisponibilidadeHorarioForm(forms.ModelForm):
         horario.save()
         return horario
 
+class DisponibilidadeRecorrenteForm(forms.Form):
+    DIAS_SEMANA = [
+        (0, 'Seg'), (1, 'Ter'), (2, 'Qua'), (3, 'Qui'), (4, 'Sex'), (5, 'Sáb'), (6, 'Dom')
+    ]
+
+    dias_semana = forms.TypedMultipleChoiceField(label='Dias da semana', choices=DIAS_SEMANA, coerce=int, widget=forms.CheckboxSelectMultiple(attrs={'class': 'mr-1'}))
+    hora_inicial = forms.TimeField(label='Início', widget=forms.TimeInput(attrs={'type': 'time', 'required': 'required', 'class': 'block w-full rounded-md bg-white/5 px-3 py-1.5 text-base text-white outline outline-1 -outline-offset-1 outline-white/10 placeholder:text-gray-500 focus:outline focus:outline-2 focus:-outline-offset-2 focus:outline-indigo-500 sm:text-sm/6'}))
+    hora_final = forms.TimeField(label='Fim', widget=forms.TimeInput(attrs={'type': 'time', 'required': 'required', 'class': 'block w-full rounded-md bg-white/5 px-3 py-1.5 text-base text-white outline outline-1 -outline-offset-1 outline-white/10 placeholder:text-gray-500 focus:outline focus:outline-2 focus:-outline-offset-2 focus:outline-indigo-500 sm:text-sm/6'}))
+    data_inicial = forms.DateField(label='A partir de', widget=forms.DateInput(attrs={'type': 'date', 'required': 'required', 'class': 'block w-full rounded-md bg-white/5 px-3 py-1.5 text-base text-white outline outline-1 -outline-offset-1 outline-white/10 placeholder:text-gray-500 focus:outline focus:outline-2 focus:-outline-offset-2 focus:outline-indigo-500 sm:text-sm/6'}))
+    semanas = forms.IntegerField(label='Semanas', min_value=1, max_value=52, widget=forms.NumberInput(attrs={'required': 'required', 'class': 'block w-full rounded-md bg-white/5 px-3 py-1.5 text-base text-white outline outline-1 -outline-offset-1 outline-white/10 placeholder:text-gray-500 focus:outline focus:outline-2 focus:-outline-offset-2 focus:outline-indigo-500 sm:text-sm/6'}))
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean(self):
+        cleaned_data = super().clean()
+        hora_inicial = cleaned_data.get('hora_inicial')
+        hora_final = cleaned_data.get('hora_final')
+
+        if hora_inicial and hora_final and hora_final <= hora_inicial:
+            raise ValidationError('O horário final deve ser maior que o inicial.')
+
+        return cleaned_data
+
+    def save(self):
+        agora = datetime.now()
+        candidatos = [
+            data for data in expande_recorrencia(
+                self.cleaned_data['data_inicial'],
+                self.cleaned_data['semanas'],
+                self.cleaned_data['dias_semana'],
+                self.cleaned_data['hora_inicial'],
+                self.cleaned_data['hora_final']
+            ) if data > agora
+        ]
+        self.total_candidatos = len(candidatos)
+        return cria_horarios_recorrentes(self.user, candidatos)
+
 class AuthMentoradoForm(forms.Form):
     token = forms.CharField(label='token', required=True, widget=forms.TextInput(attrs={'name': 'token', 'required': 'required', 'class': 'w-full p-3 rounded-md bg-gray-300 text-gray-800 focus:outline-none focus:ring-2 focus:ring-blue-500', 'placeholder': 'Digite seu token'}))
 
-    def clean_token(self):
-        token = self.cleaned_data.get('token')
-        if not Mentorados.objects.filter(token=token).exists():
-            raise ValidationError('Token inválido')
-        return token
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mentorado = None
+
+    async def ais_valid(self):
+        # O token é conferido com o ORM assíncrono, fora do clean()
+        if not self.is_valid():
+            return False
+        self.mentorado = await Mentorados.objects.filter(token=self.cleaned_data['token']).afirst()
+        if self.mentorado is None:
+            self.add_error('token', 'Token inválido')
+            return False
+        return True
     
+class HorarioIndisponivel(Exception):
+    pass
+
 class ReuniaoForm(forms.ModelForm):
     class Meta:
         model = Reuniao
@@ -79,20 +138,33 @@ class ReuniaoForm(forms.ModelForm):
     def __init__(self, mentorado, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.mentorado = mentorado
+        self.fields['data'].queryset = DisponibilidadeHorarios.objects.filter(
+            mentor_id=mentorado.user_id,
+            agendado=False,
+            data_inicial__gte=datetime.now()
+        )
 
     def clean_data(self):
         data = self.cleaned_data.get('data')
-        if not data.mentor == self.mentorado.user:
+        if not data.mentor_id == self.mentorado.user_id:
             raise ValidationError('Selecione um horario válido.')
+        if data.agendado:
+            raise ValidationError('Este horário já foi reservado.')
         return data
 
     def save(self, commit=True):
         reuniao = super().save(commit=False)
         reuniao.mentorado = self.mentorado
         with transaction.atomic():
+            # Reserva com UPDATE condicional: só um agendamento vence a disputa
+            reservado = DisponibilidadeHorarios.objects.filter(id=reuniao.data_id, agendado=False).update(agendado=True)
+            if not reservado:
+                raise HorarioIndisponivel('Este horário já foi reservado.')
             reuniao.data.agendado = True
-            reuniao.data.save()
             reuniao.save()
+            # update() não dispara post_save; o resumo entra na mesma transação
+            aplica(reuniao.data.mentor_id, None, horarios_agendados=1)
+        invalida_datas(reuniao.data.mentor_id)
         return reuniao
     
 class TarefaForm(forms.ModelForm):
@@ -125,4 +197,5 @@ class UploadsForm(forms.ModelForm):
         upload = super().save(commit=False)
         upload.mentorado = mentorado
         upload.save()
+        enfileira(upload)
         return upload
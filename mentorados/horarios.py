@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from .models import DisponibilidadeHorarios
+from .cache import invalida_datas, incrementa_versao
+from .resumo import aplica
+
+DURACAO = timedelta(minutes=50)
+
+def expande_recorrencia(data_inicial, semanas, dias_semana, hora_inicial, hora_final):
+    # Gera os inícios de cada horário de 50 minutos, já ordenados
+    candidatos = []
+    for dia in range(semanas * 7):
+        data = data_inicial + timedelta(days=dia)
+        if data.weekday() not in dias_semana:
+            continue
+        inicio = datetime.combine(data, hora_inicial)
+        fim = datetime.combine(data, hora_final)
+        while inicio + DURACAO <= fim:
+            candidatos.append(inicio)
+            inicio += DURACAO
+    return candidatos
+
+def remove_conflitos(candidatos, existentes):
+    # Varredura em duas listas ordenadas: O(n + m). Conflito a menos de
+    # DURACAO (intervalo aberto, a mesma regra de forms.conflito_horario)
+    livres = []
+    i = 0
+    for candidato in candidatos:
+        while i < len(existentes) and existentes[i] <= candidato - DURACAO:
+            i += 1
+        if i < len(existentes) and existentes[i] < candidato + DURACAO:
+            continue
+        livres.append(candidato)
+    return livres
+
+def cria_horarios_recorrentes(mentor, candidatos):
+    if not candidatos:
+        return []
+    # Uma única consulta por intervalo para todos os candidatos
+    existentes = list(
+        DisponibilidadeHorarios.objects.filter(
+            mentor=mentor,
+            data_inicial__gt=candidatos[0] - DURACAO,
+            data_inicial__lt=candidatos[-1] + DURACAO
+        ).order_by('data_inicial').values_list('data_inicial', flat=True)
+    )
+    livres = remove_conflitos(candidatos, existentes)
+    horarios = DisponibilidadeHorarios.objects.bulk_create(
+        [DisponibilidadeHorarios(mentor=mentor, data_inicial=data) for data in livres],
+        batch_size=500
+    )
+    # bulk_create não dispara post_save
+    invalida_datas(mentor.id)
+    incrementa_versao(mentor.id)
+    aplica(mentor.id, None, horarios=len(horarios))
+    return horarios
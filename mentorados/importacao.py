@@ -0,0 +1,134 @@
+import csv
+import json
+import secrets
+from django.db import transaction
+from .models import Mentorados, Navigators, Estagios
+from .cache import invalida_grafico, incrementa_versao
+from .busca import indexa_mentorados
+from .resumo import aplica
+from .exportacao import INICIO_FORMULA
+
+# utf-8-sig: o Excel grava um BOM no início, que viraria parte do primeiro cabeçalho
+CODIFICACAO = 'utf-8-sig'
+
+class LinhaInvalida(Exception):
+    pass
+
+class ArquivoInvalido(Exception):
+    # Leitura interrompida: os lotes anteriores já foram gravados
+    def __init__(self, mensagem, linha):
+        super().__init__(mensagem)
+        self.linha = linha
+
+def desprotege_celula(valor):
+    if isinstance(valor, str) and valor.startswith("'") and valor[1:].startswith(INICIO_FORMULA):
+        return valor[1:]
+    return valor
+
+def formato_arquivo(nome):
+    return 'ndjson' if nome.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+def le_linhas(arquivo, formato):
+    # Lê o arquivo linha a linha, sem carregá-lo inteiro. O texto é decodificado
+    # em blocos: num UnicodeDecodeError a linha informada é aproximada
+    if formato == 'ndjson':
+        numero = 0
+        try:
+            for numero, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    dados = json.loads(linha)
+                except ValueError:
+                    yield numero, None
+                    continue
+                yield numero, dados if isinstance(dados, dict) else None
+        except UnicodeDecodeError:
+            raise ArquivoInvalido('O arquivo deve estar em UTF-8.', numero + 1)
+    else:
+        leitor = csv.DictReader(arquivo)
+        try:
+            for numero, dados in enumerate(leitor, start=2):
+                # Desfaz a proteção contra fórmulas da exportação
+                yield numero, {campo: desprotege_celula(valor) for campo, valor in dados.items()}
+        except UnicodeDecodeError:
+            raise ArquivoInvalido('O arquivo deve estar em UTF-8.', leitor.line_num + 1)
+        except csv.Error as e:
+            # line_num conta as linhas físicas já lidas até o registro com erro
+            raise ArquivoInvalido(f'CSV inválido ({e}).', leitor.line_num + 1)
+
+def gera_tokens(quantidade):
+    # Candidatos em lote com uma única checagem de unicidade por rodada
+    tokens = set()
+    while len(tokens) < quantidade:
+        candidatos = {secrets.token_urlsafe(8) for _ in range(quantidade - len(tokens))} - tokens
+        existentes = set(Mentorados.objects.filter(token__in=candidatos).values_list('token', flat=True))
+        tokens |= candidatos - existentes
+    return list(tokens)
+
+class ImportadorMentorados:
+    ESTAGIOS = {**{valor: valor for valor in Estagios.values}, **{label: valor for valor, label in Estagios.choices}}
+
+    def __init__(self, user, tamanho_lote=1000):
+        self.user = user
+        self.tamanho_lote = tamanho_lote
+        self.criados = 0
+        self.erros = []
+        self.navigators = {}
+        for navigator in Navigators.objects.filter(user=user):
+            self.navigators[str(navigator.id)] = navigator
+            self.navigators.setdefault(navigator.nome, navigator)
+
+    def valida(self, dados):
+        if dados is None:
+            raise LinhaInvalida('Linha inválida.')
+        nome = str(dados.get('nome') or '').strip()
+        if not nome:
+            raise LinhaInvalida('Nome obrigatório.')
+        if len(nome) > 255:
+            raise LinhaInvalida('Nome com mais de 255 caracteres.')
+        if '\x00' in nome:
+            raise LinhaInvalida('Nome com caractere nulo.')
+
+        estagio = str(dados.get('estagio') or Estagios.E1).strip()
+        if estagio not in self.ESTAGIOS:
+            raise LinhaInvalida(f'Estágio inválido: {estagio}.')
+
+        navigator = None
+        if dados.get('navigator'):
+            navigator = self.navigators.get(str(dados['navigator']).strip())
+            if navigator is None:
+                raise LinhaInvalida(f'Navigator não encontrado: {dados["navigator"]}.')
+
+        return Mentorados(nome=nome, estagio=self.ESTAGIOS[estagio], navigator=navigator, user=self.user)
+
+    def importa(self, linhas):
+        # Lotes já salvos permanecem se a leitura falhar no meio (ArquivoInvalido)
+        lote = []
+        try:
+            for numero, dados in linhas:
+                try:
+                    lote.append(self.valida(dados))
+                except LinhaInvalida as e:
+                    self.erros.append((numero, str(e)))
+                    continue
+                if len(lote) >= self.tamanho_lote:
+                    self.salva(lote)
+                    lote = []
+            if lote:
+                self.salva(lote)
+        finally:
+            # bulk_create não dispara post_save
+            if self.criados:
+                invalida_grafico(self.user.id)
+                incrementa_versao(self.user.id)
+        return self.criados, self.erros
+
+    def salva(self, lote):
+        with transaction.atomic():
+            for mentorado, token in zip(lote, gera_tokens(len(lote))):
+                mentorado.token = token
+            Mentorados.objects.bulk_create(lote)
+            indexa_mentorados(lote)
+            aplica(self.user.id, None, mentorados=len(lote))
+        self.criados += len(lote)
@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import perf_counter
+from uuid import uuid4
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, OperationalError, transaction
+from mentorados.models import DisponibilidadeHorarios
+
+@contextmanager
+def banco_descartavel():
+    # Banco de teste criado e removido pelo Django (test_<nome> no Postgres),
+    # nunca o configurado. SQLite em arquivo temporário: em memória não há WAL.
+    with tempfile.TemporaryDirectory() as pasta:
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(pasta, 'benchmark.sqlite3')
+        nome_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+
+class Command(BaseCommand):
+    help = 'Mede a vazão de escrita concorrente num banco descartável. Com --perfis, compara os perfis de DB_PERFIL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--escritas', type=int, default=250, help='Escritas por thread.')
+        parser.add_argument('--perfis', nargs='+', help='Ex.: sqlite sqlite-wal postgres')
+
+    def handle(self, *args, **options):
+        if options['perfis']:
+            return self.compara(options)
+        with banco_descartavel():
+            resultado = self.mede(options['threads'], options['escritas'])
+        self.stdout.write(json.dumps(resultado))
+
+    def compara(self, options):
+        # Um subprocesso por perfil: DB_PERFIL só é lido na carga das settings
+        resultados = {}
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        for perfil in options['perfis']:
+            saida = subprocess.run(
+                [sys.executable, manage, 'benchmark_escrita', '--threads', str(options['threads']), '--escritas', str(options['escritas'])],
+                env={**os.environ, 'DB_PERFIL': perfil}, check=True, capture_output=True, text=True
+            )
+            resultados[perfil] = json.loads(saida.stdout.strip().splitlines()[-1])
+
+        for perfil, resultado in resultados.items():
+            self.stdout.write(f"{perfil:12} {resultado['escritas_por_segundo']:>10.0f} escritas/s  {resultado['erros']} erros")
+        self.stdout.write(json.dumps(resultados))
+
+    def mede(self, threads, escritas):
+        mentor = User.objects.create(username=f'benchmark-{uuid4().hex[:12]}')
+        inicio_slots = datetime(2100, 1, 1)
+
+        def escreve(indice):
+            erros = 0
+            try:
+                for i in range(escritas):
+                    try:
+                        with transaction.atomic():
+                            DisponibilidadeHorarios.objects.create(
+                                mentor=mentor,
+                                data_inicial=inicio_slots + timedelta(minutes=indice * escritas + i)
+                            )
+                    except OperationalError:
+                        erros += 1
+            finally:
+                connection.close()
+            return erros
+
+        try:
+            inicio = perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                erros = sum(pool.map(escreve, range(threads)))
+            duracao = perf_counter() - inicio
+        finally:
+            mentor.delete()
+
+        total = threads * escritas - erros
+        return {
+            'perfil': settings.DB_PERFIL,
+            'threads': threads,
+            'escritas': total,
+            'erros': erros,
+            'segundos': round(duracao, 3),
+            'escritas_por_segundo': round(total / duracao, 1)
+        }
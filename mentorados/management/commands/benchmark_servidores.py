@@ -0,0 +1,111 @@
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from math import ceil
+from time import perf_counter, sleep
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+from mentorados.models import Mentorados
+
+SERVIDORES = {
+    # Mesmo número de processos nos dois caminhos
+    'asgi': lambda workers, porta: [sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--workers', str(workers), '--port', str(porta), '--log-level', 'warning', '--no-access-log'],
+    'wsgi': lambda workers, porta: [sys.executable, '-m', 'gunicorn', 'core.wsgi:application', '--workers', str(workers), '--bind', f'127.0.0.1:{porta}', '--log-level', 'warning']
+}
+MODULOS = {'asgi': 'uvicorn', 'wsgi': 'gunicorn'}
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+class Command(BaseCommand):
+    help = 'Compara a capacidade do portal do mentorado sob uvicorn (ASGI) e gunicorn (WSGI) com o mesmo número de workers, em JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servidores', nargs='+', choices=SERVIDORES, default=list(SERVIDORES))
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concorrencia', type=int, nargs='+', default=[8, 32, 128], help='Clientes simultâneos em cada rodada.')
+        parser.add_argument('--duracao', type=float, default=10, help='Segundos por rodada.')
+        parser.add_argument('--porta', type=int, default=8100)
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--saida', help='Grava o JSON neste arquivo.')
+
+    def handle(self, *args, **options):
+        faltando = [MODULOS[nome] for nome in options['servidores'] if find_spec(MODULOS[nome]) is None]
+        if faltando:
+            raise CommandError(f'Instale {" e ".join(faltando)} para rodar a comparação.')
+
+        mentorado = Mentorados.objects.annotate(qtd=Count('tarefa')).order_by('-qtd').first()
+        if mentorado is None:
+            raise CommandError('Nenhum mentorado encontrado; rode popula_dados antes.')
+
+        # Fluxo de leitura do mentorado, com o token validado em cada requisição
+        caminhos = [reverse('escolher_dia'), reverse('agendar_reuniao'), reverse('tarefa_mentorado')]
+        resultado = {'workers': options['workers'], 'duracao_s': options['duracao'], 'servidores': {}}
+        for nome in options['servidores']:
+            base = f'http://127.0.0.1:{options["porta"]}'
+            processo = subprocess.Popen(SERVIDORES[nome](options['workers'], options['porta']))
+            try:
+                self.aguarda(base + reverse('auth_mentorado'), processo)
+                resultado['servidores'][nome] = {
+                    str(clientes): self.carga(base, caminhos, mentorado.token, clientes, options['duracao'], options['timeout'])
+                    for clientes in options['concorrencia']
+                }
+            finally:
+                processo.terminate()
+                processo.wait()
+
+        saida = json.dumps(resultado, indent=2)
+        if options['saida']:
+            with open(options['saida'], 'w') as arquivo:
+                arquivo.write(saida)
+        self.stdout.write(saida)
+
+    def aguarda(self, url, processo, tentativas=100):
+        for _ in range(tentativas):
+            if processo.poll() is not None:
+                raise CommandError('O servidor terminou antes de aceitar conexões.')
+            try:
+                urlopen(url, timeout=1).close()
+                return
+            except (URLError, ConnectionError, TimeoutError):
+                sleep(0.1)
+        raise CommandError('O servidor não respondeu a tempo.')
+
+    def carga(self, base, caminhos, token, clientes, duracao, timeout):
+        fim = perf_counter() + duracao
+
+        def cliente(indice):
+            tempos, erros = [], 0
+            while perf_counter() < fim:
+                requisicao = Request(base + caminhos[indice % len(caminhos)], headers={'Cookie': f'auth_token={token}'})
+                indice += 1
+                inicio = perf_counter()
+                try:
+                    with urlopen(requisicao, timeout=timeout) as response:
+                        response.read()
+                    tempos.append((perf_counter() - inicio) * 1000)
+                except (URLError, ConnectionError, TimeoutError):
+                    erros += 1
+            return tempos, erros
+
+        with ThreadPoolExecutor(max_workers=clientes) as executor:
+            parciais = list(executor.map(cliente, range(clientes)))
+
+        tempos = [tempo for parcial, _ in parciais for tempo in parcial]
+        erros = sum(erro for _, erro in parciais)
+        if not tempos:
+            return {'requisicoes': 0, 'erros': erros}
+        return {
+            'requisicoes': len(tempos),
+            'erros': erros,
+            'req_por_s': round(len(tempos) / duracao, 1),
+            'p50_ms': round(percentil(tempos, 50), 2),
+            'p95_ms': round(percentil(tempos, 95), 2),
+            'p99_ms': round(percentil(tempos, 99), 2)
+        }
@@ -0,0 +1,101 @@
+import json
+import tracemalloc
+from datetime import datetime
+from math import ceil
+from time import perf_counter
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mentorados.models import Mentorados, DisponibilidadeHorarios
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(ceil(p / 100 * len(ordenados)) - 1, 0)]
+
+class Command(BaseCommand):
+    help = 'Mede latência (p50/p95/p99), consultas e pico de memória das views pelo test client, em JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', help='Mentor usado nas medições; por padrão o que tem mais mentorados.')
+        parser.add_argument('--repeticoes', type=int, default=50)
+        parser.add_argument('--aquecimento', type=int, default=2)
+        parser.add_argument('--saida', help='Grava o JSON neste arquivo.')
+
+    def handle(self, *args, **options):
+        mentor = self.get_mentor(options['usuario'])
+        mentorado = Mentorados.objects.filter(user=mentor).annotate(qtd=Count('tarefa')).order_by('-qtd').first()
+        if mentorado is None:
+            raise CommandError('O mentor precisa ter mentorados; rode popula_dados antes.')
+
+        proximo = DisponibilidadeHorarios.objects.filter(mentor=mentor, agendado=False, data_inicial__gte=datetime.now()).order_by('data_inicial').first()
+        data = (proximo.data_inicial if proximo else datetime.now()).strftime('%d-%m-%Y')
+
+        client_mentor = Client(SERVER_NAME='localhost')
+        client_mentor.force_login(mentor)
+        client_mentorado = Client(SERVER_NAME='localhost')
+        client_mentorado.cookies['auth_token'] = mentorado.token
+
+        views = {
+            'MentoradosView': (client_mentor, reverse('mentorados')),
+            'ReunioesView': (client_mentor, reverse('reunioes')),
+            'TarefasView': (client_mentor, reverse('tarefa', kwargs={'id': mentorado.id})),
+            'EscolherDiaView': (client_mentorado, reverse('escolher_dia')),
+            'AgendarReuniao': (client_mentorado, reverse('agendar_reuniao') + f'?data={data}'),
+            'TarefaMentoradoView': (client_mentorado, reverse('tarefa_mentorado')),
+        }
+
+        resultado = {'mentor': mentor.username, 'repeticoes': options['repeticoes'], 'views': {}}
+        with override_settings(MENTORADO_MONITORA_CONSULTAS=False):
+            for nome, (client, url) in views.items():
+                resultado['views'][nome] = self.mede(client, url, options['repeticoes'], options['aquecimento'])
+
+        saida = json.dumps(resultado, indent=2)
+        if options['saida']:
+            with open(options['saida'], 'w') as arquivo:
+                arquivo.write(saida)
+        self.stdout.write(saida)
+
+    def get_mentor(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Usuário {username} não encontrado.')
+        mentor = User.objects.annotate(qtd=Count('mentorados')).order_by('-qtd').first()
+        if mentor is None:
+            raise CommandError('Nenhum usuário encontrado; rode popula_dados antes.')
+        return mentor
+
+    def mede(self, client, url, repeticoes, aquecimento):
+        for _ in range(aquecimento):
+            client.get(url)
+
+        tempos = []
+        consultas = []
+        for _ in range(repeticoes):
+            with CaptureQueriesContext(connection) as contexto:
+                inicio = perf_counter()
+                response = client.get(url)
+                tempos.append((perf_counter() - inicio) * 1000)
+            consultas.append(len(contexto))
+
+        # Memória medida à parte: o tracemalloc distorce a latência
+        tracemalloc.start()
+        try:
+            client.get(url)
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'status': response.status_code,
+            'p50_ms': round(percentil(tempos, 50), 2),
+            'p95_ms': round(percentil(tempos, 95), 2),
+            'p99_ms': round(percentil(tempos, 99), 2),
+            'consultas': max(consultas),
+            'memoria_pico_kb': round(pico / 1024, 1)
+        }
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from mentorados.exportacao import EXPORTACOES, FORMATOS, linhas
+
+class Command(BaseCommand):
+    help = 'Exporta mentorados, reuniões ou tarefas de um mentor em CSV ou NDJSON, linha a linha.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tipo', choices=EXPORTACOES)
+        parser.add_argument('--usuario', required=True, help='Username do mentor.')
+        parser.add_argument('--formato', choices=FORMATOS, default='csv')
+        parser.add_argument('--saida', help='Grava neste arquivo; por padrão na saída padrão.')
+        parser.add_argument('--lote', type=int, help='Linhas lidas do banco por vez.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário {options["usuario"]} não encontrado.')
+
+        conteudo = linhas(EXPORTACOES[options['tipo']], user, options['formato'], options['lote'])
+        if not options['saida']:
+            for linha in conteudo:
+                self.stdout.write(linha, ending='')
+            return
+        with open(options['saida'], 'w', encoding='utf-8', newline='') as arquivo:
+            for linha in conteudo:
+                arquivo.write(linha)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from mentorados.models import Mentorados
+from mentorados.miniaturas import gera_miniaturas
+
+class Command(BaseCommand):
+    help = 'Gera as miniaturas das fotos salvas antes de elas serem geradas no cadastro.'
+
+    def handle(self, *args, **options):
+        geradas = falhas = 0
+        pendentes = Mentorados.objects.filter(miniaturas_geradas=False).exclude(foto='').exclude(foto__isnull=True)
+        for mentorado in pendentes.only('id', 'foto').iterator():
+            if gera_miniaturas(mentorado.foto):
+                Mentorados.objects.filter(pk=mentorado.pk).update(miniaturas_geradas=True)
+                geradas += 1
+            else:
+                falhas += 1
+        self.stdout.write(f'{geradas} fotos com miniaturas geradas; {falhas} não puderam ser lidas.')
@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from mentorados.importacao import CODIFICACAO, ArquivoInvalido, ImportadorMentorados, formato_arquivo, le_linhas
+
+class Command(BaseCommand):
+    help = 'Importa mentorados de um arquivo CSV ou NDJSON (campos: nome, estagio, navigator).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--usuario', required=True, help='Username do mentor.')
+        parser.add_argument('--formato', choices=['csv', 'ndjson'])
+        parser.add_argument('--lote', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário {options["usuario"]} não encontrado.')
+
+        formato = options['formato'] or formato_arquivo(options['arquivo'])
+        importador = ImportadorMentorados(user, tamanho_lote=options['lote'])
+        try:
+            with open(options['arquivo'], encoding=CODIFICACAO, newline='') as arquivo:
+                criados, erros = importador.importa(le_linhas(arquivo, formato))
+        except ArquivoInvalido as e:
+            raise CommandError(
+                f'{e} Leitura interrompida na linha {e.linha}; '
+                f'{importador.criados} mentorados importados até ali.'
+            )
+
+        for numero, erro in erros:
+            self.stderr.write(f'Linha {numero}: {erro}')
+        self.stdout.write(f'{criados} mentorados importados, {len(erros)} linhas com erro.')
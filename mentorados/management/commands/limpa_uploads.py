@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from mentorados.uploads import limpa_uploads_expirados
+
+class Command(BaseCommand):
+    help = 'Remove uploads em partes abandonados e seus arquivos .part.'
+
+    def handle(self, *args, **options):
+        removidos = limpa_uploads_expirados()
+        self.stdout.write(f'{removidos} uploads parciais removidos.')
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from random import Random
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from mentorados.busca import reconstroi_indice
+from mentorados.cache import invalida_grafico, invalida_datas, incrementa_versao
+from mentorados.importacao import gera_tokens
+from mentorados.resumo import reconcilia
+from mentorados.models import Navigators, Mentorados, Estagios, DisponibilidadeHorarios, Reuniao, Tag, Tarefa, Upload
+
+class Command(BaseCommand):
+    help = 'Gera dados sintéticos com bulk_create para medir as views em escala.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefixo', default='seed', help='Prefixo dos usernames dos mentores.')
+        parser.add_argument('--senha', default='123456')
+        parser.add_argument('--mentores', type=int, default=5)
+        parser.add_argument('--navigators', type=int, default=3, help='Por mentor.')
+        parser.add_argument('--mentorados', type=int, default=200, help='Por mentor.')
+        parser.add_argument('--horarios', type=int, default=1000, help='Por mentor.')
+        parser.add_argument('--reunioes', type=int, default=500, help='Por mentor; ocupa parte dos horários.')
+        parser.add_argument('--tarefas', type=int, default=10, help='Por mentorado.')
+        parser.add_argument('--uploads', type=int, default=2, help='Por mentorado.')
+        parser.add_argument('--lote', type=int, default=1000)
+        parser.add_argument('--semente', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.lote = options['lote']
+        aleatorio = Random(options['semente'])
+        senha = make_password(options['senha'])
+        inicio = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+        with transaction.atomic():
+            existentes = User.objects.filter(username__startswith=f"{options['prefixo']}-").count()
+            mentores = self.cria(User, [
+                User(username=f"{options['prefixo']}-{existentes + i}", password=senha)
+                for i in range(options['mentores'])
+            ])
+
+            for mentor in mentores:
+                navigators = self.cria(Navigators, [
+                    Navigators(nome=f'Navigator {i}', user=mentor) for i in range(options['navigators'])
+                ])
+
+                tokens = gera_tokens(options['mentorados'])
+                mentorados = self.cria(Mentorados, [
+                    Mentorados(
+                        nome=f'Mentorado {i}',
+                        estagio=aleatorio.choice(Estagios.values),
+                        navigator=aleatorio.choice(navigators) if navigators else None,
+                        user=mentor,
+                        token=tokens[i]
+                    ) for i in range(options['mentorados'])
+                ])
+
+                # Metade dos horários no passado, metade no futuro, a cada 2h;
+                # as reuniões ocupam horários espaçados uniformemente
+                reunioes = min(options['reunioes'], options['horarios'])
+                passo = max(options['horarios'] // max(reunioes, 1), 1)
+                deslocamento = -(options['horarios'] // 2)
+                horarios = self.cria(DisponibilidadeHorarios, [
+                    DisponibilidadeHorarios(
+                        mentor=mentor,
+                        data_inicial=inicio + timedelta(hours=2 * (deslocamento + i)),
+                        agendado=i % passo == 0 and i // passo < reunioes
+                    ) for i in range(options['horarios'])
+                ])
+
+                if mentorados:
+                    self.cria(Reuniao, [
+                        Reuniao(data=horario, mentorado=aleatorio.choice(mentorados), tag=aleatorio.choice(Tag.values), descricao=f'Reunião {i}')
+                        for i, horario in enumerate(h for h in horarios if h.agendado)
+                    ])
+
+                self.cria(Tarefa, [
+                    Tarefa(mentorado=mentorado, tarefa=f'Tarefa {i}', realizada=aleatorio.random() < 0.5)
+                    for mentorado in mentorados for i in range(options['tarefas'])
+                ])
+                self.cria(Upload, [
+                    Upload(mentorado=mentorado, video=f'video/seed-{mentorado.id}-{i}.mp4')
+                    for mentorado in mentorados for i in range(options['uploads'])
+                ])
+
+        # bulk_create não dispara os sinais de cache, busca e resumos. Só as
+        # chaves dos mentores criados: o cache compartilhado guarda também
+        # sessões, revogações e limites de tentativas
+        for mentor in mentores:
+            invalida_grafico(mentor.id)
+            invalida_datas(mentor.id)
+            incrementa_versao(mentor.id)
+        reconstroi_indice(self.lote)
+        reconcilia(self.lote)
+        self.stdout.write(f"{len(mentores)} mentores criados ({mentores[0].username if mentores else '-'} ...), senha '{options['senha']}'.")
+
+    def cria(self, model, objetos):
+        criados = model.objects.bulk_create(objetos, batch_size=self.lote)
+        # Bancos sem RETURNING não preenchem a pk no bulk_create
+        if criados and criados[0].pk is None:
+            raise RuntimeError('O banco precisa devolver as chaves no bulk_create.')
+        return criados
@@ -0,0 +1,38 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import sleep
+from django.core.management.base import BaseCommand
+from mentorados.processamento import processadores, reserva_jobs, recupera_jobs, executa_processadores, conclui_job
+
+class Command(BaseCommand):
+    help = 'Processa os uploads enfileirados usando um pool de processos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre consultas à fila vazia.')
+        parser.add_argument('--timeout', type=int, default=3600, help='Segundos até um job em processamento voltar para a fila.')
+        parser.add_argument('--uma-vez', action='store_true', help='Esvazia a fila e encerra.')
+
+    def handle(self, *args, **options):
+        caminhos = processadores()
+        recuperados = recupera_jobs(options['timeout'])
+        if recuperados:
+            self.stdout.write(f'{recuperados} jobs recolocados na fila.')
+
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                jobs = reserva_jobs(options['workers'] * 2)
+                if not jobs:
+                    if options['uma_vez']:
+                        break
+                    sleep(options['intervalo'])
+                    continue
+
+                futuros = {pool.submit(executa_processadores, job.upload.video.path, caminhos): job for job in jobs}
+                for futuro in as_completed(futuros):
+                    job = futuros[futuro]
+                    try:
+                        conclui_job(job, campos=futuro.result())
+                        self.stdout.write(f'Upload {job.upload_id} processado.')
+                    except Exception as e:
+                        conclui_job(job, erro=repr(e))
+                        self.stderr.write(f'Upload {job.upload_id}: {e!r}')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from mentorados.resumo import reconcilia
+
+class Command(BaseCommand):
+    help = 'Recalcula do zero os resumos de mentores e mentorados, em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500)
+
+    def handle(self, *args, **options):
+        totais = reconcilia(options['lote'])
+        self.stdout.write(
+            f"{totais['mentores']} mentores e {totais['mentorados']} mentorados recalculados; "
+            f"{totais['divergentes']} resumos estavam divergentes."
+        )
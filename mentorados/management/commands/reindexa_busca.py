@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from mentorados.busca import fts_disponivel, reconstroi_indice
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca de mentorados, reuniões e tarefas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = reconstroi_indice(options['lote'])
+        motor = 'FTS5' if fts_disponivel() else 'LIKE (sem FTS5)'
+        self.stdout.write(f'{total} documentos indexados; busca por {motor}.')
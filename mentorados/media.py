@@ -0,0 +1,107 @@
+import mimetypes
+import os
+import re
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+class ArquivoParcial:
+    # Limita a leitura ao intervalo pedido; fileno permite sendfile no servidor WSGI
+    def __init__(self, arquivo, tamanho):
+        self.arquivo = arquivo
+        self.restante = tamanho
+        self.name = arquivo.name
+
+    def read(self, tamanho=-1):
+        if self.restante <= 0:
+            return b''
+        tamanho = self.restante if tamanho is None or tamanho < 0 else min(tamanho, self.restante)
+        dados = self.arquivo.read(tamanho)
+        self.restante -= len(dados)
+        return dados
+
+    def fileno(self):
+        return self.arquivo.fileno()
+
+    def close(self):
+        self.arquivo.close()
+
+def etag_arquivo(stat):
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+def intervalo(cabecalho, tamanho):
+    # Apenas um intervalo; pedidos com vários intervalos recebem o arquivo inteiro
+    match = RANGE_RE.match(cabecalho.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    inicio, fim = match.groups()
+    if inicio == '':
+        sufixo = int(fim)
+        if sufixo == 0:
+            return False
+        return max(tamanho - sufixo, 0), tamanho - 1
+    inicio = int(inicio)
+    fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio > fim or inicio >= tamanho:
+        return False
+    return inicio, fim
+
+def if_range_confere(request, etag, modificado):
+    valor = request.headers.get('If-Range')
+    if not valor:
+        return True
+    if valor.startswith(('"', 'W/')):
+        return valor == etag
+    return parse_http_date_safe(valor) == modificado
+
+def serve_arquivo(request, arquivo):
+    caminho = arquivo.path
+    stat = os.stat(caminho)
+    etag = etag_arquivo(stat)
+    modificado = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if response is not None:
+        return response
+
+    content_type = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+    envio = getattr(settings, 'MENTORADO_MEDIA_ENVIO', None)
+
+    # O proxy na frente faz a transferência (e trata Range) sozinho
+    if envio == 'x-accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = getattr(settings, 'MENTORADO_MEDIA_ACCEL_PREFIXO', '/media-protegida/') + arquivo.name
+    elif envio == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = caminho
+    else:
+        response = resposta_arquivo(request, caminho, stat.st_size, content_type, etag, modificado)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modificado)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+def resposta_arquivo(request, caminho, tamanho, content_type, etag, modificado):
+    faixa = None
+    if request.headers.get('Range') and if_range_confere(request, etag, modificado):
+        faixa = intervalo(request.headers['Range'], tamanho)
+
+    if faixa is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{tamanho}'
+        return response
+
+    if faixa is None:
+        return FileResponse(open(caminho, 'rb'), content_type=content_type)
+
+    inicio, fim = faixa
+    arquivo = open(caminho, 'rb')
+    arquivo.seek(inicio)
+    response = FileResponse(ArquivoParcial(arquivo, fim - inicio + 1), status=206, content_type=content_type)
+    response['Content-Length'] = fim - inicio + 1
+    response['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+    return response
@@ -0,0 +1,140 @@
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.functional import SimpleLazyObject
+from .auth import valida_token, avalida_token
+
+logger = logging.getLogger('mentorados.consultas')
+
+class MentoradoMiddleware:
+    # Resolve o cookie auth_token uma única vez por requisição
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.prepara(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.prepara(request)
+        return await self.get_response(request)
+
+    def prepara(self, request):
+        token = request.COOKIES.get('auth_token')
+        request.mentorado = SimpleLazyObject(lambda: valida_token(token))
+
+        # Views assíncronas: await request.amentorado()
+        async def amentorado():
+            if not hasattr(request, '_amentorado'):
+                request._amentorado = await avalida_token(token)
+            return request._amentorado
+        request.amentorado = amentorado
+
+class RegistroConsultas:
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, perf_counter() - inicio))
+
+    @property
+    def tempo_total(self):
+        return sum(tempo for _, tempo in self.consultas)
+
+    def duplicadas(self):
+        contagem = Counter(impressao_digital(sql) for sql, _ in self.consultas)
+        return {sql: total for sql, total in contagem.items() if total > 1}
+
+def impressao_digital(sql):
+    # Remove literais e colapsa listas do IN para agrupar consultas iguais
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', '(?)', sql)
+    return sql
+
+# Registro da requisição atual. As conexões do Django são por thread e as
+# consultas das views assíncronas rodam na thread do sync_to_async, que recebe
+# uma cópia deste contexto
+registro_atual = ContextVar('registro_consultas', default=None)
+
+def registra_consulta(execute, sql, params, many, context):
+    registro = registro_atual.get()
+    if registro is None:
+        return execute(sql, params, many, context)
+    return registro(execute, sql, params, many, context)
+
+def instala_registro(sender=None, connection=None, **kwargs):
+    if registra_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(registra_consulta)
+
+class ConsultasMiddleware:
+    # Registra quantidade, tempo e consultas repetidas por nome de URL. Também
+    # assíncrono: sob ASGI não força a troca sync/async antes das views async
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'MENTORADO_MONITORA_CONSULTAS', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        # Conexões abertas daqui em diante, em qualquer thread
+        connection_created.connect(instala_registro, dispatch_uid='mentorados.consultas')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        registro = RegistroConsultas()
+        token = self.inicia(registro)
+        try:
+            response = self.get_response(request)
+        finally:
+            registro_atual.reset(token)
+        self.registra(request, registro)
+        return response
+
+    async def __acall__(self, request):
+        registro = RegistroConsultas()
+        token = self.inicia(registro)
+        try:
+            response = await self.get_response(request)
+        finally:
+            registro_atual.reset(token)
+        self.registra(request, registro)
+        return response
+
+    def inicia(self, registro):
+        # Conexões desta thread abertas antes do middleware
+        for conexao in connections.all(initialized_only=True):
+            instala_registro(connection=conexao)
+        return registro_atual.set(registro)
+
+    def registra(self, request, registro):
+        match = request.resolver_match
+        nome = match.view_name if match else request.path
+        duplicadas = registro.duplicadas()
+        logger.info(
+            '%s %s consultas=%d tempo=%.1fms duplicadas=%d',
+            request.method, nome, len(registro.consultas), registro.tempo_total * 1000, len(duplicadas)
+        )
+        for sql, total in duplicadas.items():
+            logger.warning('%s consulta repetida %dx: %s', nome, total, sql)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 03:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorados', '0006_alter_tarefa_options_alter_upload_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='disponibilidadehorarios',
+            index=models.Index(fields=['mentor', 'data_inicial', 'agendado'], name='horarios_mentor_data_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 03:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorados', '0007_horarios_mentor_data_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadParcial',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=255)),
+                ('tamanho', models.BigIntegerField()),
+                ('recebido', models.BigIntegerField(default=0)),
+                ('proximo_chunk', models.PositiveIntegerField(default=0)),
+                ('crc32', models.BigIntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('mentorado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mentorados.mentorados')),
+            ],
+            options={
+                'verbose_name': 'upload parcial',
+                'verbose_name_plural': 'uploads parciais',
+                'db_table': 'upload_parcial',
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 03:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorados', '0008_upload_parcial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='duracao',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='formato',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='upload',
+            name='tamanho',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ProcessamentoUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('P', 'Pendente'), ('E', 'Em processamento'), ('C', 'Concluído'), ('X', 'Erro')], default='P', max_length=1)),
+                ('tentativas', models.PositiveIntegerField(default=0)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('concluido_em', models.DateTimeField(blank=True, null=True)),
+                ('upload', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='processamento', to='mentorados.upload')),
+            ],
+            options={
+                'verbose_name': 'processamento',
+                'verbose_name_plural': 'processamentos',
+                'db_table': 'processamento_upload',
+                'indexes': [models.Index(fields=['status', 'id'], name='processamento_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 03:21
+
+import mentorados.miniaturas
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorados', '0009_upload_processamento'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mentorados',
+            name='foto',
+            field=models.ImageField(blank=True, null=True, upload_to=mentorados.miniaturas.caminho_foto),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2 on 2026-10-18 03:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+# Índice FTS5 com conteúdo externo: os triggers mantêm busca_fts igual à
+# tabela busca. mentor_id entra no índice para filtrar dentro do MATCH.
+CRIA_FTS = [
+    """CREATE VIRTUAL TABLE busca_fts USING fts5(
+        texto, mentor_id, content='busca', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER busca_ai AFTER INSERT ON busca BEGIN
+        INSERT INTO busca_fts(rowid, texto, mentor_id) VALUES (new.id, new.texto, new.mentor_id);
+    END""",
+    """CREATE TRIGGER busca_ad AFTER DELETE ON busca BEGIN
+        INSERT INTO busca_fts(busca_fts, rowid, texto, mentor_id) VALUES ('delete', old.id, old.texto, old.mentor_id);
+    END""",
+    """CREATE TRIGGER busca_au AFTER UPDATE ON busca BEGIN
+        INSERT INTO busca_fts(busca_fts, rowid, texto, mentor_id) VALUES ('delete', old.id, old.texto, old.mentor_id);
+        INSERT INTO busca_fts(rowid, texto, mentor_id) VALUES (new.id, new.texto, new.mentor_id);
+    END""",
+]
+
+REMOVE_FTS = [
+    'DROP TRIGGER IF EXISTS busca_ai',
+    'DROP TRIGGER IF EXISTS busca_ad',
+    'DROP TRIGGER IF EXISTS busca_au',
+    'DROP TABLE IF EXISTS busca_fts',
+]
+
+def cria_fts(apps, schema_editor):
+    # Outros bancos, ou SQLite sem FTS5, usam a busca por LIKE na tabela busca
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(CRIA_FTS[0])
+        except OperationalError:
+            return
+        for sql in CRIA_FTS[1:]:
+            cursor.execute(sql)
+
+def remove_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in REMOVE_FTS:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorados', '0010_mentorados_foto_sharded'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('M', 'Mentorado'), ('R', 'Reunião'), ('T', 'Tarefa')], max_length=1)),
+                ('objeto_id', models.BigIntegerField()),
+                ('texto', models.TextField()),
+                ('mentor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('mentorado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mentorados.mentorados')),
+            ],
+            options={
+                'verbose_name': 'busca',
+                'verbose_name_plural': 'busca',
+                'db_table': 'busca',
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='busca_tipo_objeto_uniq')],
+            },
+        ),
+        migrations.RunPython(cria_fts, remove_fts),
+    ]
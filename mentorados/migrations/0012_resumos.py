@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 03:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('mentorados', '0011_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMentor',
+            fields=[
+                ('reunioes_g', models.IntegerField(default=0)),
+                ('reunioes_m', models.IntegerField(default=0)),
+                ('reunioes_rh', models.IntegerField(default=0)),
+                ('reunioes_i', models.IntegerField(default=0)),
+                ('tarefas', models.IntegerField(default=0)),
+                ('tarefas_realizadas', models.IntegerField(default=0)),
+                ('uploads', models.IntegerField(default=0)),
+                ('mentor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('mentorados', models.IntegerField(default=0)),
+                ('horarios', models.IntegerField(default=0)),
+                ('horarios_agendados', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'resumo do mentor',
+                'verbose_name_plural': 'resumos dos mentores',
+                'db_table': 'resumo_mentor',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoMentorado',
+            fields=[
+                ('reunioes_g', models.IntegerField(default=0)),
+                ('reunioes_m', models.IntegerField(default=0)),
+                ('reunioes_rh', models.IntegerField(default=0)),
+                ('reunioes_i', models.IntegerField(default=0)),
+                ('tarefas', models.IntegerField(default=0)),
+                ('tarefas_realizadas', models.IntegerField(default=0)),
+                ('uploads', models.IntegerField(default=0)),
+                ('mentorado', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo', serialize=False, to='mentorados.mentorados')),
+            ],
+            options={
+                'verbose_name': 'resumo do mentorado',
+                'verbose_name_plural': 'resumos dos mentorados',
+                'db_table': 'resumo_mentorado',
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorados', '0013_upload_parcial_reserva'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorados',
+            name='miniaturas_geradas',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+def preenche_resumos(apps, schema_editor):
+    # Os resumos criados na 0012 começam vazios e os deltas só valem a partir
+    # do deploy: sem o preenchimento, a primeira alteração criaria uma linha
+    # só com aquele delta. Usa a mesma rotina de reconcilia_resumos.
+    from mentorados.resumo import reconcilia
+    reconcilia()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentorados', '0014_mentorados_miniaturas_geradas'),
+    ]
+
+    operations = [
+        migrations.RunPython(preenche_resumos, migrations.RunPython.noop),
+    ]
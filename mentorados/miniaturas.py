@@ -0,0 +1,54 @@
+import os
+from io import BytesIO
+from uuid import uuid4
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+TAMANHOS = (32, 48, 64)
+
+def caminho_foto(instance, filename):
+    # Diretórios fotos/ab/cd/ mantêm cada pasta pequena
+    digest = uuid4().hex
+    extensao = os.path.splitext(filename)[1].lower()
+    return f'fotos/{digest[:2]}/{digest[2:4]}/{digest}{extensao}'
+
+def nome_miniatura(nome, tamanho):
+    return f'miniaturas/{tamanho}/{os.path.splitext(nome)[0]}.webp'
+
+def miniatura(foto, tamanho):
+    # Só monta a URL: as miniaturas são geradas quando a foto é salva
+    # (sinal em signals.py), sem abrir imagem nem consultar o disco aqui
+    if not foto:
+        return ''
+    if tamanho not in TAMANHOS or not getattr(foto.instance, 'miniaturas_geradas', False):
+        return foto.url
+    return default_storage.url(nome_miniatura(foto.name, tamanho))
+
+def gera_miniaturas(foto):
+    # Retorna False se a foto não pôde ser lida; o template usa a original
+    try:
+        for tamanho in TAMANHOS:
+            nome = nome_miniatura(foto.name, tamanho)
+            if not default_storage.exists(nome):
+                gera_miniatura(foto, nome, tamanho)
+    except (OSError, ValueError):
+        remove_miniaturas(foto.name)
+        return False
+    return True
+
+def gera_miniatura(foto, nome, tamanho):
+    with foto.open('rb') as arquivo:
+        imagem = ImageOps.exif_transpose(Image.open(arquivo))
+        imagem = ImageOps.fit(imagem.convert('RGBA'), (tamanho, tamanho), Image.LANCZOS)
+
+    conteudo = BytesIO()
+    imagem.save(conteudo, 'WEBP', quality=85)
+    salvo = default_storage.save(nome, ContentFile(conteudo.getvalue()))
+    # Outra requisição gerou a mesma miniatura ao mesmo tempo
+    if salvo != nome:
+        default_storage.delete(salvo)
+
+def remove_miniaturas(nome):
+    for tamanho in TAMANHOS:
+        default_storage.delete(nome_miniatura(nome, tamanho))
@@ -2,7 +2,25 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils.timezone import timedelta
 import secrets 
+import uuid
 from datetime import time
+from .miniaturas import caminho_foto
+
+class ValoresOriginais:
+    # Valores carregados do banco, usados pelos sinais (deltas dos resumos e
+    # troca de dono, revogação de sessões quando o token muda)
+    campos_originais = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._originais = {campo: instance.__dict__.get(campo) for campo in cls.campos_originais}
+        return instance
+
+    def save(self, *args, **kwargs):
+        response = super().save(*args, **kwargs)
+        self._originais = {campo: getattr(self, campo) for campo in self.campos_originais}
+        return response
 
 class Navigators(models.Model):
     nome = models.CharField(max_length=255)
@@ -21,9 +39,13 @@ class Estagios(models.TextChoices):
     E2 = 'E2', '101-500K'
     E3 = 'E3', '501-1M'
 
-class Mentorados(models.Model):
+class Mentorados(ValoresOriginais, models.Model):
+    campos_originais = ('token', 'foto', 'user_id')
+
     nome = models.CharField(max_length=255)
-    foto = models.ImageField(upload_to='fotos', null=True, blank=True)
+    foto = models.ImageField(upload_to=caminho_foto, null=True, blank=True)
+    # Miniaturas da foto atual já gravadas (signals.py); sem elas o template usa a foto
+    miniaturas_geradas = models.BooleanField(default=False, editable=False)
     estagio = models.CharField(max_length=2, choices=Estagios.choices, default=Estagios.E1)
     navigator = models.ForeignKey(Navigators, null=True, on_delete=models.SET_NULL)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -52,7 +74,9 @@ class Mentorados(models.Model):
     
 # Reuniões
     
-class DisponibilidadeHorarios(models.Model):
+class DisponibilidadeHorarios(ValoresOriginais, models.Model):
+    campos_originais = ('agendado', 'mentor_id')
+
     data_inicial = models.DateTimeField(null=True, blank=True)
     mentor = models.ForeignKey(User, on_delete=models.CASCADE)
     agendado = models.BooleanField(default=False)
@@ -65,6 +89,9 @@ class DisponibilidadeHorarios(models.Model):
         db_table = 'horarios'
         verbose_name = 'horarios'
         verbose_name_plural = 'horarios'
+        indexes = [
+            models.Index(fields=['mentor', 'data_inicial', 'agendado'], name='horarios_mentor_data_idx')
+        ]
     
     def __str__(self):
         return f'{self.data_inicial.time()} às {self.data_final.time()}'
@@ -75,7 +102,9 @@ class Tag(models.TextChoices):
     RH = 'RH', 'Gestão de pessoas'
     I = 'I', 'Impostos'
     
-class Reuniao(models.Model):
+class Reuniao(ValoresOriginais, models.Model):
+    campos_originais = ('tag', 'mentorado_id', 'data_id')
+
     data = models.ForeignKey(DisponibilidadeHorarios, on_delete=models.CASCADE)
     mentorado = models.ForeignKey(Mentorados, on_delete=models.CASCADE)
     tag = models.CharField(max_length=2, choices=Tag.choices, default=Tag.G)
@@ -89,7 +118,9 @@ class Reuniao(models.Model):
     def __str__(self):
         return f'{self.mentorado} - {self.data}'
 
-class Tarefa(models.Model):
+class Tarefa(ValoresOriginais, models.Model):
+    campos_originais = ('realizada', 'mentorado_id')
+
     mentorado = models.ForeignKey(Mentorados, on_delete=models.DO_NOTHING)
     tarefa = models.CharField(max_length=255)
     realizada = models.BooleanField(default=False)
@@ -99,11 +130,127 @@ class Tarefa(models.Model):
         verbose_name = 'tarefa'
         verbose_name_plural = 'tarefas'
 
-class Upload(models.Model):
+class Upload(ValoresOriginais, models.Model):
+    campos_originais = ('mentorado_id',)
+
     mentorado = models.ForeignKey(Mentorados, on_delete=models.DO_NOTHING)
     video = models.FileField(upload_to='video')
+    # preenchidos pelo processamento em segundo plano
+    tamanho = models.BigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, null=True, blank=True)
+    formato = models.CharField(max_length=20, null=True, blank=True)
+    duracao = models.FloatField(null=True, blank=True)
 
     class Meta:
         db_table = 'upload'
         verbose_name = 'upload'
-        verbose_name_plural = 'uploads'
\ No newline at end of file
+        verbose_name_plural = 'uploads'
+
+class StatusProcessamento(models.TextChoices):
+    PENDENTE = 'P', 'Pendente'
+    PROCESSANDO = 'E', 'Em processamento'
+    CONCLUIDO = 'C', 'Concluído'
+    ERRO = 'X', 'Erro'
+
+class ProcessamentoUpload(models.Model):
+    upload = models.OneToOneField(Upload, on_delete=models.CASCADE, related_name='processamento')
+    status = models.CharField(max_length=1, choices=StatusProcessamento.choices, default=StatusProcessamento.PENDENTE)
+    tentativas = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'processamento_upload'
+        verbose_name = 'processamento'
+        verbose_name_plural = 'processamentos'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='processamento_status_idx')
+        ]
+
+class UploadParcial(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    mentorado = models.ForeignKey(Mentorados, on_delete=models.CASCADE)
+    nome = models.CharField(max_length=255)
+    tamanho = models.BigIntegerField()
+    recebido = models.BigIntegerField(default=0)
+    proximo_chunk = models.PositiveIntegerField(default=0)
+    crc32 = models.BigIntegerField(default=0)
+    # Reserva do chunk em gravação; expira se a requisição morrer no meio
+    gravando_desde = models.DateTimeField(null=True, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_parcial'
+        verbose_name = 'upload parcial'
+        verbose_name_plural = 'uploads parciais'
+
+# Busca
+
+class TipoBusca(models.TextChoices):
+    MENTORADO = 'M', 'Mentorado'
+    REUNIAO = 'R', 'Reunião'
+    TAREFA = 'T', 'Tarefa'
+
+class IndiceBusca(models.Model):
+    # Um documento por objeto; no SQLite a tabela FTS5 busca_fts espelha esta por triggers
+    tipo = models.CharField(max_length=1, choices=TipoBusca.choices)
+    objeto_id = models.BigIntegerField()
+    mentor = models.ForeignKey(User, on_delete=models.CASCADE)
+    mentorado = models.ForeignKey(Mentorados, on_delete=models.CASCADE)
+    texto = models.TextField()
+
+    class Meta:
+        db_table = 'busca'
+        verbose_name = 'busca'
+        verbose_name_plural = 'busca'
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'objeto_id'], name='busca_tipo_objeto_uniq')
+        ]
+
+# Resumos (contadores mantidos por deltas em mentorados/resumo.py)
+
+class ContadoresResumo(models.Model):
+    reunioes_g = models.IntegerField(default=0)
+    reunioes_m = models.IntegerField(default=0)
+    reunioes_rh = models.IntegerField(default=0)
+    reunioes_i = models.IntegerField(default=0)
+    tarefas = models.IntegerField(default=0)
+    tarefas_realizadas = models.IntegerField(default=0)
+    uploads = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def reunioes(self):
+        return {label: getattr(self, f'reunioes_{valor.lower()}') for valor, label in Tag.choices}
+
+    @property
+    def taxa_conclusao(self):
+        return self.tarefas_realizadas / self.tarefas if self.tarefas else 0
+
+class ResumoMentor(ContadoresResumo):
+    mentor = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='resumo')
+    mentorados = models.IntegerField(default=0)
+    horarios = models.IntegerField(default=0)
+    horarios_agendados = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'resumo_mentor'
+        verbose_name = 'resumo do mentor'
+        verbose_name_plural = 'resumos dos mentores'
+
+    @property
+    def utilizacao(self):
+        return self.horarios_agendados / self.horarios if self.horarios else 0
+
+class ResumoMentorado(ContadoresResumo):
+    mentorado = models.OneToOneField(Mentorados, primary_key=True, on_delete=models.CASCADE, related_name='resumo')
+
+    class Meta:
+        db_table = 'resumo_mentorado'
+        verbose_name = 'resumo do mentorado'
+        verbose_name_plural = 'resumos dos mentorados'
@@ -0,0 +1,37 @@
+from datetime import datetime
+from django.db.models import Q
+from .models import Reuniao
+
+FILTROS = ('proximas', 'passadas')
+
+def codifica_cursor(reuniao):
+    return f'{reuniao.data.data_inicial.isoformat()}_{reuniao.id}'
+
+def decodifica_cursor(valor):
+    try:
+        data, id = valor.rsplit('_', 1)
+        return datetime.fromisoformat(data), int(id)
+    except (AttributeError, ValueError):
+        return None
+
+def pagina_reunioes(user, filtro='proximas', cursor=None, tamanho=20):
+    # Paginação por chave (data_inicial, id): custo constante em qualquer página
+    agora = datetime.now()
+    reunioes = Reuniao.objects.filter(data__mentor=user).select_related('mentorado', 'data')
+
+    if filtro == 'passadas':
+        reunioes = reunioes.filter(data__data_inicial__lt=agora).order_by('-data__data_inicial', '-id')
+    else:
+        reunioes = reunioes.filter(data__data_inicial__gte=agora).order_by('data__data_inicial', 'id')
+
+    posicao = decodifica_cursor(cursor) if cursor else None
+    if posicao:
+        data, id = posicao
+        if filtro == 'passadas':
+            reunioes = reunioes.filter(Q(data__data_inicial__lt=data) | Q(data__data_inicial=data, id__lt=id))
+        else:
+            reunioes = reunioes.filter(Q(data__data_inicial__gt=data) | Q(data__data_inicial=data, id__gt=id))
+
+    pagina = list(reunioes[:tamanho + 1])
+    proximo = codifica_cursor(pagina[tamanho - 1]) if len(pagina) > tamanho else None
+    return pagina[:tamanho], proximo
@@ -0,0 +1,67 @@
+# Processadores executados pelos workers: recebem o caminho do arquivo e
+# devolvem os campos de Upload a atualizar. Não acessam o banco.
+import hashlib
+import os
+import struct
+
+TAMANHO_LEITURA = 1024 * 1024
+
+# Registro dos processadores, na ordem de execução; substituível por
+# MENTORADO_PROCESSADORES
+PROCESSADORES = [
+    'mentorados.processadores.hash_conteudo',
+    'mentorados.processadores.metadados_container',
+]
+
+def hash_conteudo(caminho):
+    sha256 = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(TAMANHO_LEITURA), b''):
+            sha256.update(bloco)
+    return {'sha256': sha256.hexdigest(), 'tamanho': os.path.getsize(caminho)}
+
+def metadados_container(caminho):
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.read(12)
+        if cabecalho[4:8] == b'ftyp':
+            marca = cabecalho[8:12]
+            formato = 'mov' if marca == b'qt  ' else 'mp4'
+            return {'formato': formato, 'duracao': duracao_mp4(arquivo, os.path.getsize(caminho))}
+        if cabecalho[:4] == b'\x1a\x45\xdf\xa3':
+            return {'formato': 'matroska'}
+        if cabecalho[:4] == b'RIFF' and cabecalho[8:12] == b'AVI ':
+            return {'formato': 'avi'}
+    return {'formato': 'desconhecido'}
+
+def caixas_mp4(arquivo, inicio, fim):
+    # Percorre só os cabeçalhos das caixas ISO BMFF, pulando o conteúdo
+    posicao = inicio
+    while posicao + 8 <= fim:
+        arquivo.seek(posicao)
+        tamanho, tipo = struct.unpack('>I4s', arquivo.read(8))
+        cabecalho = 8
+        if tamanho == 1:
+            tamanho = struct.unpack('>Q', arquivo.read(8))[0]
+            cabecalho = 16
+        elif tamanho == 0:
+            tamanho = fim - posicao
+        if tamanho < cabecalho:
+            return
+        yield tipo, posicao + cabecalho, posicao + tamanho
+        posicao += tamanho
+
+def duracao_mp4(arquivo, tamanho):
+    for tipo, inicio, fim in caixas_mp4(arquivo, 0, tamanho):
+        if tipo != b'moov':
+            continue
+        for tipo_filho, inicio_filho, _ in caixas_mp4(arquivo, inicio, fim):
+            if tipo_filho != b'mvhd':
+                continue
+            arquivo.seek(inicio_filho)
+            versao = arquivo.read(4)[0]
+            if versao == 1:
+                escala, duracao = struct.unpack('>16xIQ', arquivo.read(28))
+            else:
+                escala, duracao = struct.unpack('>8xII', arquivo.read(16))
+            return duracao / escala if escala else None
+    return None
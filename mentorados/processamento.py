@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils.module_loading import import_string
+from .models import ProcessamentoUpload, StatusProcessamento, Upload
+from .cache import incrementa_versao
+from .processadores import PROCESSADORES
+
+def processadores():
+    return getattr(settings, 'MENTORADO_PROCESSADORES', PROCESSADORES)
+
+def enfileira(upload):
+    # Só registra o job; o processamento fica com o worker
+    ProcessamentoUpload.objects.update_or_create(
+        upload=upload,
+        defaults={'status': StatusProcessamento.PENDENTE, 'erro': '', 'iniciado_em': None, 'concluido_em': None}
+    )
+
+def reserva_jobs(limite):
+    ids = ProcessamentoUpload.objects.filter(status=StatusProcessamento.PENDENTE).order_by('id').values_list('id', flat=True)[:limite]
+    reservados = []
+    for id in list(ids):
+        # UPDATE condicional: outro worker pode ter reservado o mesmo job
+        if ProcessamentoUpload.objects.filter(id=id, status=StatusProcessamento.PENDENTE).update(
+            status=StatusProcessamento.PROCESSANDO,
+            iniciado_em=datetime.now(),
+            tentativas=F('tentativas') + 1
+        ):
+            reservados.append(id)
+    jobs = list(ProcessamentoUpload.objects.filter(id__in=reservados).select_related('upload__mentorado'))
+    # update() não dispara post_save
+    for user_id in {job.upload.mentorado.user_id for job in jobs}:
+        incrementa_versao(user_id)
+    return jobs
+
+def recupera_jobs(timeout):
+    # Jobs presos por um worker que morreu voltam para a fila
+    return ProcessamentoUpload.objects.filter(
+        status=StatusProcessamento.PROCESSANDO,
+        iniciado_em__lt=datetime.now() - timedelta(seconds=timeout)
+    ).update(status=StatusProcessamento.PENDENTE)
+
+def executa_processadores(caminho, caminhos):
+    # Roda no processo do pool
+    campos = {}
+    for caminho_processador in caminhos:
+        campos.update(import_string(caminho_processador)(caminho))
+    return campos
+
+def conclui_job(job, campos=None, erro=None):
+    if erro is None:
+        Upload.objects.filter(id=job.upload_id).update(**campos)
+        job.status = StatusProcessamento.CONCLUIDO
+        job.erro = ''
+    else:
+        job.status = StatusProcessamento.ERRO
+        job.erro = erro
+    job.concluido_em = datetime.now()
+    job.save(update_fields=['status', 'erro', 'concluido_em'])
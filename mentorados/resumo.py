@@ -0,0 +1,192 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.contrib.auth.models import User
+from .models import ResumoMentor, ResumoMentorado, Mentorados, DisponibilidadeHorarios, Reuniao, Tarefa, Upload
+
+CAMPOS_MENTOR = [f.name for f in ResumoMentor._meta.concrete_fields if not f.primary_key]
+CAMPOS_MENTORADO = [f.name for f in ResumoMentorado._meta.concrete_fields if not f.primary_key]
+
+def campo_tag(tag):
+    return f'reunioes_{tag.lower()}'
+
+# Leitura: uma consulta pela chave primária
+
+def resumo_mentor(mentor_id):
+    return ResumoMentor.objects.filter(pk=mentor_id).first() or ResumoMentor(mentor_id=mentor_id)
+
+def resumo_mentorado(mentorado_id):
+    return ResumoMentorado.objects.filter(pk=mentorado_id).first() or ResumoMentorado(mentorado_id=mentorado_id)
+
+# Deltas
+
+def aplica_delta(model, pk, cria=True, **deltas):
+    deltas = {campo: delta for campo, delta in deltas.items() if delta}
+    if not deltas or pk is None:
+        return
+    atualizacao = {campo: F(campo) + delta for campo, delta in deltas.items()}
+    if model.objects.filter(pk=pk).update(**atualizacao) or not cria:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(pk=pk, **deltas)
+    except IntegrityError:
+        # Criada por outra requisição entre o UPDATE e o INSERT
+        model.objects.filter(pk=pk).update(**atualizacao)
+
+def aplica(mentor_id, mentorado_id, criado=True, **deltas):
+    # Exclusões só decrementam: em cascata a linha pode estar sendo removida
+    aplica_delta(ResumoMentor, mentor_id, cria=criado, **deltas)
+    if mentorado_id is not None:
+        aplica_delta(ResumoMentorado, mentorado_id, cria=criado, **{c: d for c, d in deltas.items() if c in CAMPOS_MENTORADO})
+
+def mentor_do_mentorado(mentorado_id):
+    return Mentorados.objects.filter(id=mentorado_id).values_list('user_id', flat=True).first()
+
+def mentor_da_reuniao(reuniao):
+    if Reuniao.data.is_cached(reuniao):
+        return reuniao.data.mentor_id
+    return DisponibilidadeHorarios.objects.filter(id=reuniao.data_id).values_list('mentor_id', flat=True).first()
+
+def original(instance, campo):
+    # None quando o objeto não veio do banco (não há como saber o valor anterior)
+    return getattr(instance, '_originais', {}).get(campo)
+
+def mudou(instance, campo):
+    anterior = original(instance, campo)
+    return anterior is not None and anterior != getattr(instance, campo)
+
+def negativos(deltas):
+    return {campo: -delta for campo, delta in deltas.items()}
+
+# Troca de dono: os contadores saem da linha antiga (sem criá-la) e entram na nova
+
+def mentorado_salvo(instance, created):
+    if created:
+        aplica(instance.user_id, None, mentorados=1)
+    elif mudou(instance, 'user_id'):
+        # Tarefas e uploads contam para o mentor do mentorado; as reuniões, para o dono do horário
+        contagem = calcula_resumos_mentorados([instance.pk])[0]
+        deltas = {'mentorados': 1, **{campo: getattr(contagem, campo) for campo in ('tarefas', 'tarefas_realizadas', 'uploads')}}
+        aplica(original(instance, 'user_id'), None, criado=False, **negativos(deltas))
+        aplica(instance.user_id, None, **deltas)
+
+def mentorado_removido(instance):
+    aplica(instance.user_id, None, criado=False, mentorados=-1)
+
+def horario_salvo(instance, created):
+    if created:
+        aplica(instance.mentor_id, None, horarios=1, horarios_agendados=int(instance.agendado))
+    elif mudou(instance, 'mentor_id'):
+        reunioes = {
+            campo_tag(tag): qtd
+            for tag, qtd in Reuniao.objects.filter(data_id=instance.pk).order_by().values_list('tag').annotate(qtd=Count('id'))
+        }
+        aplica(original(instance, 'mentor_id'), None, criado=False, horarios=-1, horarios_agendados=-int(original(instance, 'agendado')), **negativos(reunioes))
+        aplica(instance.mentor_id, None, horarios=1, horarios_agendados=int(instance.agendado), **reunioes)
+    elif mudou(instance, 'agendado'):
+        aplica(instance.mentor_id, None, horarios_agendados=1 if instance.agendado else -1)
+
+def horario_removido(instance):
+    aplica(instance.mentor_id, None, criado=False, horarios=-1, horarios_agendados=-int(instance.agendado))
+
+def reuniao_salva(instance, created):
+    if created:
+        aplica(mentor_da_reuniao(instance), instance.mentorado_id, **{campo_tag(instance.tag): 1})
+    elif mudou(instance, 'data_id') or mudou(instance, 'mentorado_id'):
+        mentor_anterior = DisponibilidadeHorarios.objects.filter(id=original(instance, 'data_id')).values_list('mentor_id', flat=True).first()
+        aplica(mentor_anterior, original(instance, 'mentorado_id'), criado=False, **{campo_tag(original(instance, 'tag')): -1})
+        aplica(mentor_da_reuniao(instance), instance.mentorado_id, **{campo_tag(instance.tag): 1})
+    elif mudou(instance, 'tag'):
+        aplica(mentor_da_reuniao(instance), instance.mentorado_id, **{campo_tag(original(instance, 'tag')): -1, campo_tag(instance.tag): 1})
+
+def reuniao_removida(instance):
+    aplica(mentor_da_reuniao(instance), instance.mentorado_id, criado=False, **{campo_tag(instance.tag): -1})
+
+def tarefa_salva(instance, created):
+    if created:
+        aplica(mentor_do_mentorado(instance.mentorado_id), instance.mentorado_id, tarefas=1, tarefas_realizadas=int(instance.realizada))
+    elif mudou(instance, 'mentorado_id'):
+        anterior = original(instance, 'mentorado_id')
+        aplica(mentor_do_mentorado(anterior), anterior, criado=False, tarefas=-1, tarefas_realizadas=-int(original(instance, 'realizada')))
+        aplica(mentor_do_mentorado(instance.mentorado_id), instance.mentorado_id, tarefas=1, tarefas_realizadas=int(instance.realizada))
+    elif mudou(instance, 'realizada'):
+        aplica(mentor_do_mentorado(instance.mentorado_id), instance.mentorado_id, tarefas_realizadas=1 if instance.realizada else -1)
+
+def tarefa_removida(instance):
+    aplica(mentor_do_mentorado(instance.mentorado_id), instance.mentorado_id, criado=False, tarefas=-1, tarefas_realizadas=-int(instance.realizada))
+
+def upload_salvo(instance, created):
+    if created:
+        aplica(mentor_do_mentorado(instance.mentorado_id), instance.mentorado_id, uploads=1)
+    elif mudou(instance, 'mentorado_id'):
+        anterior = original(instance, 'mentorado_id')
+        aplica(mentor_do_mentorado(anterior), anterior, criado=False, uploads=-1)
+        aplica(mentor_do_mentorado(instance.mentorado_id), instance.mentorado_id, uploads=1)
+
+def upload_removido(instance):
+    aplica(mentor_do_mentorado(instance.mentorado_id), instance.mentorado_id, criado=False, uploads=-1)
+
+# Reconciliação: recalcula do zero, em lotes de chaves
+
+def conta(queryset, chave, **contagens):
+    resultado = {}
+    for linha in queryset.order_by().values(chave).annotate(**contagens):
+        resultado[linha.pop(chave)] = linha
+    return resultado
+
+def contagens_comuns(ids, chave_reuniao, chave):
+    reunioes = {}
+    for linha in Reuniao.objects.filter(**{f'{chave_reuniao}__in': ids}).order_by().values(chave_reuniao, 'tag').annotate(qtd=Count('id')):
+        reunioes.setdefault(linha[chave_reuniao], {})[campo_tag(linha['tag'])] = linha['qtd']
+    tarefas = conta(Tarefa.objects.filter(**{f'{chave}__in': ids}), chave, tarefas=Count('id'), tarefas_realizadas=Count('id', filter=Q(realizada=True)))
+    uploads = conta(Upload.objects.filter(**{f'{chave}__in': ids}), chave, uploads=Count('id'))
+    return reunioes, tarefas, uploads
+
+def calcula_resumos_mentores(ids):
+    reunioes, tarefas, uploads = contagens_comuns(ids, 'data__mentor_id', 'mentorado__user_id')
+    mentorados = conta(Mentorados.objects.filter(user_id__in=ids), 'user_id', mentorados=Count('id'))
+    horarios = conta(DisponibilidadeHorarios.objects.filter(mentor_id__in=ids), 'mentor_id', horarios=Count('id'), horarios_agendados=Count('id', filter=Q(agendado=True)))
+    resumos = []
+    for id in ids:
+        resumo = ResumoMentor(mentor_id=id)
+        for parcial in (reunioes, tarefas, uploads, mentorados, horarios):
+            for campo, valor in parcial.get(id, {}).items():
+                setattr(resumo, campo, valor)
+        resumos.append(resumo)
+    return resumos
+
+def calcula_resumos_mentorados(ids):
+    reunioes, tarefas, uploads = contagens_comuns(ids, 'mentorado_id', 'mentorado_id')
+    resumos = []
+    for id in ids:
+        resumo = ResumoMentorado(mentorado_id=id)
+        for parcial in (reunioes, tarefas, uploads):
+            for campo, valor in parcial.get(id, {}).items():
+                setattr(resumo, campo, valor)
+        resumos.append(resumo)
+    return resumos
+
+def grava_lote(model, campos, resumos):
+    # Retorna quantos resumos existentes estavam divergentes
+    existentes = model.objects.in_bulk([r.pk for r in resumos])
+    divergentes = sum(
+        1 for r in resumos
+        if r.pk in existentes and any(getattr(r, c) != getattr(existentes[r.pk], c) for c in campos)
+    )
+    model.objects.bulk_create(resumos, update_conflicts=True, unique_fields=[model._meta.pk.name], update_fields=campos)
+    return divergentes
+
+def reconcilia(tamanho_lote=500):
+    # Um lote por transação; linhas de quem foi removido já saem em cascata
+    totais = {'mentores': 0, 'mentorados': 0, 'divergentes': 0}
+    for model, campos, ids, calcula, chave in (
+        (ResumoMentor, CAMPOS_MENTOR, User.objects.order_by('id').values_list('id', flat=True), calcula_resumos_mentores, 'mentores'),
+        (ResumoMentorado, CAMPOS_MENTORADO, Mentorados.objects.order_by('id').values_list('id', flat=True), calcula_resumos_mentorados, 'mentorados'),
+    ):
+        ids = list(ids)
+        for inicio in range(0, len(ids), tamanho_lote):
+            lote = ids[inicio:inicio + tamanho_lote]
+            with transaction.atomic():
+                totais['divergentes'] += grava_lote(model, campos, calcula(lote))
+            totais[chave] += len(lote)
+    return totais
@@ -0,0 +1,127 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Navigators, Mentorados, DisponibilidadeHorarios, Reuniao, Tarefa, Upload, ProcessamentoUpload
+from .cache import invalida_grafico, invalida_datas, incrementa_versao
+from .auth import cache_tokens, revoga_sessao
+from .busca import indexa, remove_indice
+from .miniaturas import gera_miniaturas, remove_miniaturas
+from . import resumo
+
+@receiver([post_save, post_delete], sender=Mentorados)
+def grafico_alterado(sender, instance, **kwargs):
+    invalida_grafico(instance.user_id)
+
+@receiver([post_save, post_delete], sender=Mentorados)
+def invalida_token(sender, instance, **kwargs):
+    cache_tokens.invalida(instance)
+
+@receiver(post_save, sender=Mentorados)
+def revoga_token_alterado(sender, instance, **kwargs):
+    token_original = resumo.original(instance, 'token')
+    if token_original and token_original != instance.token:
+        revoga_sessao(instance.pk, token_original)
+
+@receiver(post_delete, sender=Mentorados)
+def revoga_token_removido(sender, instance, **kwargs):
+    revoga_sessao(instance.pk, instance.token)
+
+@receiver([post_save, post_delete], sender=DisponibilidadeHorarios)
+def invalida_datas_disponiveis(sender, instance, **kwargs):
+    invalida_datas(instance.mentor_id)
+
+# Versão das páginas do mentor
+
+@receiver([post_save, post_delete], sender=Navigators)
+@receiver([post_save, post_delete], sender=Mentorados)
+def versao_por_user(sender, instance, **kwargs):
+    incrementa_versao(instance.user_id)
+
+@receiver([post_save, post_delete], sender=DisponibilidadeHorarios)
+def versao_horario(sender, instance, **kwargs):
+    incrementa_versao(instance.mentor_id)
+
+@receiver([post_save, post_delete], sender=Reuniao)
+def versao_reuniao(sender, instance, **kwargs):
+    mentor_id = DisponibilidadeHorarios.objects.filter(id=instance.data_id).values_list('mentor_id', flat=True).first()
+    if mentor_id is not None:
+        incrementa_versao(mentor_id)
+
+def versao_do_mentorado(mentorado_id):
+    # Na exclusão em cascata o mentorado pode já não existir
+    user_id = Mentorados.objects.filter(id=mentorado_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        incrementa_versao(user_id)
+
+@receiver([post_save, post_delete], sender=Tarefa)
+@receiver([post_save, post_delete], sender=Upload)
+def versao_por_mentorado(sender, instance, **kwargs):
+    versao_do_mentorado(instance.mentorado_id)
+
+@receiver(post_save, sender=ProcessamentoUpload)
+def versao_processamento(sender, instance, **kwargs):
+    versao_do_mentorado(instance.upload.mentorado_id)
+
+# Miniaturas da foto: geradas ao salvar, não na renderização
+
+def nome_foto(foto):
+    # Do banco vem o nome; depois de salvo, o FieldFile
+    return getattr(foto, 'name', foto) or ''
+
+@receiver(post_save, sender=Mentorados)
+def miniaturas_foto(sender, instance, created, raw=False, **kwargs):
+    anterior = nome_foto(resumo.original(instance, 'foto'))
+    atual = nome_foto(instance.foto)
+    if raw or (not created and anterior == atual and instance.miniaturas_geradas == bool(atual)):
+        return
+    if anterior and anterior != atual:
+        remove_miniaturas(anterior)
+    geradas = gera_miniaturas(instance.foto) if atual else False
+    if geradas != instance.miniaturas_geradas:
+        Mentorados.objects.filter(pk=instance.pk).update(miniaturas_geradas=geradas)
+        instance.miniaturas_geradas = geradas
+
+@receiver(post_delete, sender=Mentorados)
+def remove_miniaturas_foto(sender, instance, **kwargs):
+    if instance.foto:
+        remove_miniaturas(instance.foto.name)
+
+# Índice de busca
+
+@receiver(post_save, sender=Mentorados)
+@receiver(post_save, sender=Reuniao)
+@receiver(post_save, sender=Tarefa)
+def indexa_busca(sender, instance, **kwargs):
+    indexa(instance)
+
+@receiver(post_delete, sender=Mentorados)
+@receiver(post_delete, sender=Reuniao)
+@receiver(post_delete, sender=Tarefa)
+def remove_busca(sender, instance, **kwargs):
+    remove_indice(instance)
+
+# Resumos por deltas
+
+SALVOS = {
+    Mentorados: resumo.mentorado_salvo,
+    DisponibilidadeHorarios: resumo.horario_salvo,
+    Reuniao: resumo.reuniao_salva,
+    Tarefa: resumo.tarefa_salva,
+    Upload: resumo.upload_salvo,
+}
+REMOVIDOS = {
+    Mentorados: resumo.mentorado_removido,
+    DisponibilidadeHorarios: resumo.horario_removido,
+    Reuniao: resumo.reuniao_removida,
+    Tarefa: resumo.tarefa_removida,
+    Upload: resumo.upload_removido,
+}
+
+@receiver(post_save)
+def resumo_salvo(sender, instance, created, raw=False, **kwargs):
+    if sender in SALVOS and not raw:
+        SALVOS[sender](instance, created)
+
+@receiver(post_delete)
+def resumo_removido(sender, instance, **kwargs):
+    if sender in REMOVIDOS:
+        REMOVIDOS[sender](instance)
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models import Case, When, Value, Count
+from .models import Tarefa
+from .cache import incrementa_versao
+from .resumo import aplica
+
+def altera_tarefas(tarefas, ids, realizada=None):
+    # tarefas: queryset já restrito ao dono; realizada=None alterna o valor
+    tarefas = tarefas.filter(id__in=ids)
+    with transaction.atomic():
+        if realizada is None:
+            alteradas = list(tarefas.values_list('id', flat=True))
+            Tarefa.objects.filter(id__in=alteradas).update(
+                realizada=Case(When(realizada=True, then=Value(False)), default=Value(True))
+            )
+        else:
+            alteradas = list(tarefas.exclude(realizada=realizada).values_list('id', flat=True))
+            Tarefa.objects.filter(id__in=alteradas).update(realizada=realizada)
+        resultado = list(Tarefa.objects.filter(id__in=alteradas).order_by('id').values('id', 'realizada'))
+
+        # update() não dispara post_save: resumos na mesma transação
+        mentores = set()
+        grupos = Tarefa.objects.filter(id__in=alteradas).order_by().values('mentorado_id', 'mentorado__user_id', 'realizada').annotate(qtd=Count('id'))
+        for grupo in grupos:
+            mentores.add(grupo['mentorado__user_id'])
+            # Toda tarefa alterada trocou de valor
+            aplica(grupo['mentorado__user_id'], grupo['mentorado_id'], tarefas_realizadas=grupo['qtd'] if grupo['realizada'] else -grupo['qtd'])
+
+    for user_id in mentores:
+        incrementa_versao(user_id)
+    return resultado
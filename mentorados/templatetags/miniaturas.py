@@ -0,0 +1,8 @@
+from django import template
+from mentorados.miniaturas import miniatura as url_miniatura
+
+register = template.Library()
+
+@register.simple_tag
+def miniatura(foto, tamanho):
+    return url_miniatura(foto, tamanho)
@@ -1,3 +1,1071 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, OperationalError
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.conf import settings
+from datetime import datetime, timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+from json import loads, dumps
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from time import perf_counter, sleep, time
+from tempfile import mkdtemp
+from shutil import rmtree
+from django.core.management import call_command
+from .models import DisponibilidadeHorarios, Mentorados, Reuniao, Navigators, Tarefa, Upload, ProcessamentoUpload, ResumoMentor, ResumoMentorado
+from .forms import DisponibilidadeHorarioForm, DisponibilidadeRecorrenteForm, ReuniaoForm, HorarioIndisponivel, conflito_horario
+from .horarios import remove_conflitos
+from .models import UploadParcial
+from .uploads import caminho_parcial
+from .miniaturas import TAMANHOS, miniatura, nome_miniatura
+from .forms import MentoradosCadastroForm
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.base import ContentFile
+from PIL import Image
+from .exportacao import EXPORTACOES, linhas
+from .importacao import ArquivoInvalido, ImportadorMentorados, le_linhas
+from django.contrib.messages import get_messages
+from django.core.management.base import CommandError
+from io import TextIOWrapper
+from .resumo import CAMPOS_MENTOR, CAMPOS_MENTORADO, calcula_resumos_mentores, calcula_resumos_mentorados, reconcilia
+from .tarefas import altera_tarefas
+from importlib import import_module
+from django.apps import apps
+from .auth import cache_tokens, valida_token, valida_sessao, assina_sessao, le_sessao
+from .checks import sessao_assinada_sem_cache
 
-# Create your tests here.
+class CacheCompartilhadoTestCase(TestCase):
+    # FileBasedCache não está em CACHES_LOCAIS: faz as vezes de Redis/Memcached
+    @classmethod
+    def setUpClass(cls):
+        pasta = mkdtemp()
+        cls.addClassCleanup(rmtree, pasta, ignore_errors=True)
+        cls.enterClassContext(override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': pasta}}))
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+
+class ConflitoHorarioTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='mentor', password='123456')
+        self.inicio = datetime(2030, 1, 7, 9, 0)
+        DisponibilidadeHorarios.objects.create(mentor=self.user, data_inicial=self.inicio)
+
+    def test_conflito_no_intervalo_de_50_minutos(self):
+        form = DisponibilidadeHorarioForm(self.user, data={'data_inicial': self.inicio + timedelta(minutes=30)})
+        self.assertFalse(form.is_valid())
+
+    def test_sem_conflito_fora_do_intervalo(self):
+        form = DisponibilidadeHorarioForm(self.user, data={'data_inicial': self.inicio + timedelta(minutes=60)})
+        self.assertTrue(form.is_valid())
+
+    def test_conflito_em_uma_consulta(self):
+        with self.assertNumQueries(1):
+            conflito_horario(self.user, self.inicio).exists()
+
+    @skipUnless(connection.vendor == 'sqlite', 'plano de consulta do SQLite')
+    def test_plano_usa_indice_composto(self):
+        plano = conflito_horario(self.user, self.inicio).explain()
+        self.assertIn('horarios_mentor_data_idx', plano)
+
+    def test_mesma_regra_do_formulario_e_da_recorrencia(self):
+        for minutos in (-60, -50, -49, 0, 49, 50, 60):
+            with self.subTest(minutos=minutos):
+                candidato = self.inicio + timedelta(minutes=minutos)
+                form = DisponibilidadeHorarioForm(self.user, data={'data_inicial': candidato})
+                self.assertEqual(form.is_valid(), remove_conflitos([candidato], [self.inicio]) == [candidato])
+
+class HorariosRecorrentesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='mentor', password='123456')
+        # Segunda-feira
+        self.dia = datetime(2030, 1, 7)
+
+    def recorrencia(self, **dados):
+        dados = {'dias_semana': [0], 'hora_inicial': '13:00', 'hora_final': '15:00', 'data_inicial': self.dia.date(), 'semanas': 1, **dados}
+        form = DisponibilidadeRecorrenteForm(self.user, data=dados)
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_gera_horarios_encostados(self):
+        horarios = self.recorrencia().save()
+        self.assertEqual([h.data_inicial.time().isoformat('minutes') for h in horarios], ['13:00', '13:50'])
+
+    def test_ignora_conflitos_existentes(self):
+        DisponibilidadeHorarios.objects.create(mentor=self.user, data_inicial=self.dia.replace(hour=13, minute=20))
+        form = self.recorrencia(hora_final='16:20')
+        horarios = form.save()
+        # 13:00 e 13:50 ficam a menos de 50 minutos de 13:20; 14:40 encosta em 13:50 mas este foi ignorado
+        self.assertEqual([h.data_inicial.time().isoformat('minutes') for h in horarios], ['14:40', '15:30'])
+        self.assertEqual(form.total_candidatos, 4)
+
+    def test_formulario_aceita_horario_encostado_nos_gerados(self):
+        self.recorrencia().save()
+        form = DisponibilidadeHorarioForm(self.user, data={'data_inicial': self.dia.replace(hour=14, minute=40)})
+        self.assertTrue(form.is_valid())
+        form = DisponibilidadeHorarioForm(self.user, data={'data_inicial': self.dia.replace(hour=14, minute=30)})
+        self.assertFalse(form.is_valid())
+
+    def test_uma_consulta_de_conflitos(self):
+        form = self.recorrencia(semanas=4, dias_semana=[0, 2, 4])
+        with CaptureQueriesContext(connection) as contexto:
+            horarios = form.save()
+        self.assertEqual(len(horarios), 24)
+        # Uma consulta de conflitos e um INSERT em lote, qualquer que seja o número de candidatos
+        consultas = [c['sql'] for c in contexto.captured_queries if 'FROM "horarios"' in c['sql'] or 'INTO "horarios"' in c['sql']]
+        self.assertEqual([sql.split()[0] for sql in consultas], ['SELECT', 'INSERT'])
+
+    def test_varredura(self):
+        base = datetime(2030, 1, 7, 13, 0)
+        candidatos = [base + timedelta(minutes=50 * i) for i in range(4)]
+        existentes = [base + timedelta(minutes=20), base + timedelta(minutes=120)]
+        self.assertEqual(remove_conflitos(candidatos, existentes), [])
+        self.assertEqual(remove_conflitos(candidatos, [base - timedelta(minutes=50)]), candidatos)
+
+class AgendamentoConcorrenteTest(TransactionTestCase):
+    HORARIOS = 20
+    TENTATIVAS = 400
+
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        inicio = datetime(2030, 1, 7, 9, 0)
+        self.horarios = [
+            DisponibilidadeHorarios.objects.create(mentor=self.mentor, data_inicial=inicio + timedelta(hours=i))
+            for i in range(self.HORARIOS)
+        ]
+        self.mentorados = [Mentorados.objects.create(nome=f'm{i}', user=self.mentor) for i in range(10)]
+
+    def agenda(self, i):
+        horario = self.horarios[i % self.HORARIOS]
+        mentorado = self.mentorados[i % len(self.mentorados)]
+        try:
+            for _ in range(50):
+                try:
+                    form = ReuniaoForm(mentorado, data={'data': horario.id, 'tag': 'G', 'descricao': 'Reunião'})
+                    if not form.is_valid():
+                        return False
+                    form.save()
+                    return True
+                except HorarioIndisponivel:
+                    return False
+                except OperationalError:
+                    # SQLite serializa escritas; a tentativa é repetida
+                    sleep(0.001)
+            return False
+        finally:
+            connection.close()
+
+    def test_sem_agendamento_duplicado(self):
+        inicio = perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            resultados = list(pool.map(self.agenda, range(self.TENTATIVAS)))
+        duracao = perf_counter() - inicio
+
+        print(f'\n{self.TENTATIVAS} tentativas, {sum(resultados)} agendamentos em {duracao:.2f}s ({self.TENTATIVAS / duracao:.0f} tentativas/s)')
+        self.assertEqual(sum(resultados), self.HORARIOS)
+        self.assertEqual(Reuniao.objects.count(), self.HORARIOS)
+        self.assertEqual(Reuniao.objects.values('data').distinct().count(), self.HORARIOS)
+        self.assertFalse(DisponibilidadeHorarios.objects.filter(agendado=False).exists())
+
+# Cache próprio: o cache.clear() de mede() não apaga o estado de outros testes
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'orcamento-consultas'}})
+class OrcamentoConsultasTest(TestCase):
+    # Máximo de consultas por view (sessão e usuário incluídos), com cache frio
+    ORCAMENTO = {
+        'mentorados': 5,
+        'reunioes': 3,
+        'tarefa': 5,
+        'escolher_dia': 2,
+        'agendar_reuniao': 3,
+        'tarefa_mentorado': 3,
+        'auth_mentorado': 0,
+        'login': 0,
+        'cadastro': 0,
+    }
+
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.navigator = Navigators.objects.create(nome='navigator', user=self.mentor)
+        self.mentorado = Mentorados.objects.create(nome='mentorado', user=self.mentor, navigator=self.navigator)
+        self.amanha = datetime.now() + timedelta(days=1)
+        self.criados = 0
+
+        self.client_mentor = Client()
+        self.client_mentor.login(username='mentor', password='123456')
+        self.client_mentorado = Client()
+        self.client_mentorado.cookies['auth_token'] = self.mentorado.token
+
+    def popula(self, quantidade):
+        for _ in range(quantidade):
+            i = self.criados
+            self.criados += 1
+            Mentorados.objects.create(nome=f'm{i}', user=self.mentor, navigator=self.navigator)
+            DisponibilidadeHorarios.objects.create(mentor=self.mentor, data_inicial=self.amanha + timedelta(days=i % 20, hours=i))
+            horario = DisponibilidadeHorarios.objects.create(mentor=self.mentor, data_inicial=self.amanha + timedelta(days=i % 20, minutes=30 + i), agendado=True)
+            Reuniao.objects.create(data=horario, mentorado=self.mentorado, descricao='Reunião')
+            Tarefa.objects.create(mentorado=self.mentorado, tarefa=f'Tarefa {i}')
+            upload = Upload.objects.create(mentorado=self.mentorado, video=f'video/{i}.mp4')
+            ProcessamentoUpload.objects.create(upload=upload)
+
+    def requisicoes(self):
+        anonimo = Client()
+        return {
+            'mentorados': (self.client_mentor, reverse('mentorados')),
+            'reunioes': (self.client_mentor, reverse('reunioes')),
+            'tarefa': (self.client_mentor, reverse('tarefa', kwargs={'id': self.mentorado.id})),
+            'escolher_dia': (self.client_mentorado, reverse('escolher_dia')),
+            'agendar_reuniao': (self.client_mentorado, reverse('agendar_reuniao') + f'?data={self.amanha:%d-%m-%Y}'),
+            'tarefa_mentorado': (self.client_mentorado, reverse('tarefa_mentorado')),
+            'auth_mentorado': (anonimo, reverse('auth_mentorado')),
+            'login': (anonimo, reverse('login')),
+            'cadastro': (anonimo, reverse('cadastro')),
+        }
+
+    def mede(self):
+        consultas = {}
+        for nome, (client, url) in self.requisicoes().items():
+            cache.clear()
+            with CaptureQueriesContext(connection) as contexto:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, nome)
+            consultas[nome] = len(contexto)
+        return consultas
+
+    def test_orcamento_com_dez_vezes_os_dados(self):
+        self.popula(5)
+        base = self.mede()
+        self.popula(45)
+        escala = self.mede()
+
+        for nome, limite in self.ORCAMENTO.items():
+            with self.subTest(view=nome):
+                self.assertLessEqual(escala[nome], limite)
+                # N+1: o número de consultas não pode crescer com os dados
+                self.assertEqual(escala[nome], base[nome])
+
+    @override_settings(MENTORADO_MONITORA_CONSULTAS=True)
+    def test_middleware_registra_consultas(self):
+        with self.assertLogs('mentorados.consultas', level='INFO') as logs:
+            Client().get(reverse('login'))
+        self.assertIn('GET login consultas=0', logs.output[0])
+
+class ExportacaoTest(TestCase):
+    NOMES = ['Ana', '=1+1', 'Bruno', '@soma', 'Carla']
+
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        outro = User.objects.create_user(username='outro', password='123456')
+        navigator = Navigators.objects.create(nome='Nav, "1"', user=self.mentor)
+        self.mentorados = [Mentorados.objects.create(nome=nome, user=self.mentor, navigator=navigator) for nome in self.NOMES]
+        Mentorados.objects.create(nome='de outro mentor', user=outro)
+
+    def esperado(self):
+        criado_em = self.mentorados[0].criado_em.isoformat()
+        nomes = {'=1+1': "'=1+1", '@soma': "'@soma"}
+        return ['id,nome,estagio,navigator,criado_em'] + [
+            f'{m.id},{nomes.get(m.nome, m.nome)},{m.estagio},"Nav, ""1""",{criado_em}' for m in self.mentorados
+        ]
+
+    def test_csv_em_lotes_menores_que_o_total(self):
+        conteudo = list(linhas(EXPORTACOES['mentorados'], self.mentor, 'csv', lote=2))
+        # Cabeçalho mais uma string por linha, independente do lote
+        self.assertEqual(len(conteudo), len(self.NOMES) + 1)
+        self.assertEqual(''.join(conteudo).splitlines(), self.esperado())
+
+    def test_view_ndjson(self):
+        client = Client()
+        client.login(username='mentor', password='123456')
+        with self.settings(MENTORADO_EXPORTACAO_LOTE=2):
+            response = client.get(reverse('exportar', kwargs={'tipo': 'mentorados'}) + '?formato=ndjson')
+        self.assertTrue(response.streaming)
+        linhas_json = b''.join(response.streaming_content).decode().splitlines()
+        # NDJSON não é aberto como planilha: nomes sem apóstrofo
+        self.assertEqual([loads(linha)['nome'] for linha in linhas_json], self.NOMES)
+
+    def test_comando(self):
+        saida = StringIO()
+        call_command('exporta_dados', 'mentorados', usuario='mentor', lote=2, stdout=saida)
+        self.assertEqual(saida.getvalue().splitlines(), self.esperado())
+
+
+def consultas_token(contexto):
+    return [c['sql'] for c in contexto.captured_queries if '"mentorados"."token" =' in c['sql']]
+
+class CacheTokensTest(CacheCompartilhadoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.mentorado = Mentorados.objects.create(nome='mentorado', user=self.mentor)
+
+    def test_miss_consulta_e_guarda(self):
+        self.assertIsNone(cache_tokens.get(self.mentorado.token))
+        with self.assertNumQueries(1):
+            self.assertEqual(valida_token(self.mentorado.token), self.mentorado)
+        self.assertEqual(cache_tokens.get(self.mentorado.token), self.mentorado)
+
+    def test_hit_sem_consulta(self):
+        valida_token(self.mentorado.token)
+        with self.assertNumQueries(0):
+            self.assertEqual(valida_token(self.mentorado.token), self.mentorado)
+
+    def test_token_inexistente_nao_e_guardado(self):
+        self.assertIsNone(valida_token('inexistente'))
+        with self.assertNumQueries(1):
+            self.assertIsNone(valida_token('inexistente'))
+
+    def test_troca_de_token_invalida(self):
+        antigo = self.mentorado.token
+        valida_token(antigo)
+        self.mentorado.token = None
+        self.mentorado.save()
+
+        self.assertIsNone(valida_token(antigo))
+        self.assertEqual(valida_token(self.mentorado.token), self.mentorado)
+
+    def test_pagina_do_mentorado_aquecida_sem_consulta_de_token(self):
+        client = Client()
+        client.cookies['auth_token'] = self.mentorado.token
+        client.get(reverse('tarefa_mentorado'))
+        with CaptureQueriesContext(connection) as contexto:
+            response = client.get(reverse('tarefa_mentorado'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(consultas_token(contexto), [])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tokens-local'}})
+    def test_sem_cache_compartilhado_consulta_a_cada_requisicao(self):
+        valida_token(self.mentorado.token)
+        self.assertIsNone(cache_tokens.get(self.mentorado.token))
+        with self.assertNumQueries(1):
+            self.assertEqual(valida_token(self.mentorado.token), self.mentorado)
+
+@override_settings(MENTORADO_SESSAO_ASSINADA=True, MENTORADO_SESSAO_MAX_AGE=3600)
+class SessaoAssinadaTest(CacheCompartilhadoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.mentorado = Mentorados.objects.create(nome='mentorado', user=self.mentor)
+        self.cookie = assina_sessao(self.mentorado)
+
+    def test_cookie_assinado_sem_o_token(self):
+        self.assertNotIn(self.mentorado.token, self.cookie)
+        self.assertEqual(le_sessao(self.cookie)['id'], self.mentorado.pk)
+        self.assertEqual(valida_sessao(self.cookie), self.mentorado)
+
+    def test_login_grava_cookie_assinado(self):
+        client = Client()
+        client.post(reverse('auth_mentorado'), {'token': self.mentorado.token})
+        valor = client.cookies['auth_token'].value
+        self.assertNotEqual(valor, self.mentorado.token)
+        self.assertEqual(valida_token(valor), self.mentorado)
+
+    def test_expira_apos_max_age(self):
+        with patch('django.core.signing.time.time', return_value=time() + 3601):
+            self.assertIsNone(valida_sessao(self.cookie))
+
+    def test_cookie_adulterado(self):
+        payload, resto = self.cookie.split(':', 1)
+        self.assertIsNone(valida_sessao(payload[:-1] + ('A' if payload[-1] != 'A' else 'B') + ':' + resto))
+        self.assertIsNone(valida_sessao(self.cookie[:-1] + ('A' if self.cookie[-1] != 'A' else 'B')))
+        # O token puro não é uma sessão assinada
+        self.assertIsNone(valida_sessao(self.mentorado.token))
+
+    def test_sessao_aquecida_sem_consulta(self):
+        valida_sessao(self.cookie)
+        with self.assertNumQueries(0):
+            self.assertEqual(valida_sessao(self.cookie), self.mentorado)
+
+    def test_revogada_quando_o_token_muda(self):
+        valida_sessao(self.cookie)
+        self.mentorado.token = None
+        self.mentorado.save()
+
+        # Lista de revogação no cache compartilhado: recusada sem consultar o banco
+        with self.assertNumQueries(0):
+            self.assertIsNone(valida_sessao(self.cookie))
+        self.assertEqual(valida_sessao(assina_sessao(self.mentorado)), self.mentorado)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'sessao-local'}})
+    def test_revogada_sem_cache_compartilhado(self):
+        # Sem a lista de revogação a versão do token é conferida no banco
+        with self.assertNumQueries(1):
+            self.assertEqual(valida_sessao(self.cookie), self.mentorado)
+        Mentorados.objects.filter(pk=self.mentorado.pk).update(token='outro-token')
+        self.assertIsNone(valida_sessao(self.cookie))
+        self.assertEqual([aviso.id for aviso in sessao_assinada_sem_cache(None)], ['mentorados.W001'])
+
+    def test_sem_aviso_com_cache_compartilhado(self):
+        self.assertEqual(sessao_assinada_sem_cache(None), [])
+
+class UploadEmPartesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        media, parciais = mkdtemp(), mkdtemp()
+        cls.addClassCleanup(rmtree, media, ignore_errors=True)
+        cls.addClassCleanup(rmtree, parciais, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media, MENTORADO_UPLOAD_PARCIAL_DIR=parciais))
+        super().setUpClass()
+
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.mentorado = Mentorados.objects.create(nome='mentorado', user=self.mentor)
+        self.client.login(username='mentor', password='123456')
+        self.chunks = [b'a' * 1000, b'b' * 1000, b'c' * 500]
+
+    def inicia(self, nome='aula.mp4', tamanho=2500):
+        response = self.client.post(
+            reverse('upload_iniciar', kwargs={'id': self.mentorado.id}),
+            dumps({'nome': nome, 'tamanho': tamanho}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def envia(self, id, indice, dados, crc=None):
+        return self.client.post(
+            reverse('upload_chunk', kwargs={'upload_id': id, 'chunk': indice}), dados,
+            content_type='application/octet-stream', headers={'X-Crc32': str(zlib.crc32(dados) if crc is None else crc)}
+        )
+
+    def finaliza(self, id, dados):
+        return self.client.post(reverse('upload_finalizar', kwargs={'upload_id': id}), headers={'X-Crc32': str(zlib.crc32(dados))})
+
+    def envia_tudo(self, id, chunks):
+        for indice, dados in enumerate(chunks):
+            self.assertEqual(self.envia(id, indice, dados).status_code, 200)
+
+    def test_upload_completo(self):
+        id = self.inicia()
+        self.envia_tudo(id, self.chunks)
+        response = self.finaliza(id, b''.join(self.chunks))
+        self.assertEqual(response.status_code, 201)
+
+        upload = Upload.objects.get(id=response.json()['id'])
+        with upload.video.open('rb') as arquivo:
+            self.assertEqual(arquivo.read(), b''.join(self.chunks))
+        self.assertTrue(upload.video.name.endswith('.mp4'))
+        self.assertTrue(ProcessamentoUpload.objects.filter(upload=upload).exists())
+        self.assertFalse(UploadParcial.objects.filter(id=id).exists())
+        self.assertFalse(os.path.exists(caminho_parcial(UploadParcial(id=id))))
+
+    def test_mesmo_nome_nao_sobrescreve(self):
+        conteudos = [b'x' * 2500, b'y' * 2500]
+        ids = [self.inicia() for _ in conteudos]
+        for id, conteudo in zip(ids, conteudos):
+            self.envia_tudo(id, [conteudo])
+        uploads = [Upload.objects.get(id=self.finaliza(id, conteudo).json()['id']) for id, conteudo in zip(ids, conteudos)]
+
+        self.assertNotEqual(uploads[0].video.name, uploads[1].video.name)
+        for upload, conteudo in zip(uploads, conteudos):
+            with upload.video.open('rb') as arquivo:
+                self.assertEqual(arquivo.read(), conteudo)
+
+    def test_parcial_fora_do_media_root(self):
+        id = self.inicia()
+        caminho = caminho_parcial(UploadParcial(id=id))
+        self.assertTrue(os.path.exists(caminho))
+        self.assertFalse(os.path.abspath(caminho).startswith(os.path.abspath(settings.MEDIA_ROOT)))
+
+    def test_chunk_fora_de_ordem(self):
+        id = self.inicia()
+        response = self.envia(id, 1, self.chunks[1])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['proximo_chunk'], 0)
+        self.assertEqual(UploadParcial.objects.get(id=id).recebido, 0)
+
+    def test_checksum_divergente(self):
+        id = self.inicia()
+        response = self.envia(id, 0, self.chunks[0], crc=zlib.crc32(self.chunks[0]) + 1)
+        self.assertEqual(response.status_code, 400)
+        parcial = UploadParcial.objects.get(id=id)
+        self.assertEqual((parcial.recebido, parcial.proximo_chunk, parcial.gravando_desde), (0, 0, None))
+        self.assertEqual(os.path.getsize(caminho_parcial(parcial)), 0)
+
+        # O mesmo chunk, íntegro, é aceito em seguida
+        self.envia_tudo(id, self.chunks)
+        self.assertEqual(self.finaliza(id, b''.join(self.chunks)).status_code, 201)
+
+    def test_reenvio_de_chunk(self):
+        id = self.inicia()
+        self.envia(id, 0, self.chunks[0])
+        response = self.envia(id, 0, self.chunks[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'recebido': 1000, 'proximo_chunk': 1})
+        self.assertEqual(os.path.getsize(caminho_parcial(UploadParcial(id=id))), 1000)
+
+    def test_finalizar_com_chunks_faltando(self):
+        id = self.inicia()
+        self.envia_tudo(id, self.chunks[:2])
+        response = self.finaliza(id, b''.join(self.chunks))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['erro'], 'Upload incompleto.')
+        self.assertTrue(UploadParcial.objects.filter(id=id).exists())
+        self.assertFalse(Upload.objects.exists())
+
+    def test_chunk_maior_que_o_arquivo(self):
+        id = self.inicia(tamanho=1500)
+        self.envia(id, 0, self.chunks[0])
+        self.assertEqual(self.envia(id, 1, self.chunks[1]).status_code, 400)
+        self.assertEqual(UploadParcial.objects.get(id=id).recebido, 1000)
+
+    def test_upload_de_outro_mentor(self):
+        id = self.inicia()
+        User.objects.create_user(username='outro', password='123456')
+        self.client.login(username='outro', password='123456')
+        self.assertEqual(self.envia(id, 0, self.chunks[0]).status_code, 404)
+
+class VideoIntervaloTest(TestCase):
+    CONTEUDO = bytes(range(256)) * 4
+
+    @classmethod
+    def setUpClass(cls):
+        media = mkdtemp()
+        cls.addClassCleanup(rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        os.makedirs(os.path.join(media, 'video'))
+        with open(os.path.join(media, 'video', 'aula.mp4'), 'wb') as arquivo:
+            arquivo.write(cls.CONTEUDO)
+        super().setUpClass()
+
+    def setUp(self):
+        mentor = User.objects.create_user(username='mentor', password='123456')
+        self.mentorado = Mentorados.objects.create(nome='mentorado', user=mentor)
+        self.upload = Upload.objects.create(mentorado=self.mentorado, video='video/aula.mp4')
+        self.url = reverse('video', kwargs={'id': self.upload.id})
+        self.client.login(username='mentor', password='123456')
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        conteudo = b''.join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, conteudo
+
+    def test_arquivo_inteiro(self):
+        response, conteudo = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(conteudo, self.CONTEUDO)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+
+    def test_intervalo_parcial(self):
+        response, conteudo = self.get(Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(conteudo, self.CONTEUDO[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.CONTEUDO)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+    def test_intervalo_aberto_e_fim_alem_do_arquivo(self):
+        response, conteudo = self.get(Range='bytes=1000-')
+        self.assertEqual((response.status_code, conteudo), (206, self.CONTEUDO[1000:]))
+        response, conteudo = self.get(Range='bytes=1020-5000')
+        self.assertEqual((response.status_code, conteudo), (206, self.CONTEUDO[1020:]))
+
+    def test_intervalo_sufixo(self):
+        response, conteudo = self.get(Range='bytes=-100')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(conteudo, self.CONTEUDO[-100:])
+        self.assertEqual(response['Content-Range'], f'bytes {len(self.CONTEUDO) - 100}-{len(self.CONTEUDO) - 1}/{len(self.CONTEUDO)}')
+        # Sufixo maior que o arquivo: o arquivo inteiro
+        response, conteudo = self.get(Range='bytes=-5000')
+        self.assertEqual((response.status_code, conteudo), (206, self.CONTEUDO))
+
+    def test_intervalo_insatisfatorio(self):
+        for faixa in ('bytes=5000-', 'bytes=20-10', 'bytes=-0'):
+            with self.subTest(faixa=faixa):
+                response, _ = self.get(Range=faixa)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response['Content-Range'], f'bytes */{len(self.CONTEUDO)}')
+
+    def test_intervalo_invalido_ou_multiplo_envia_tudo(self):
+        for faixa in ('bytes=0-1,5-9', 'itens=0-9', 'bytes=-'):
+            with self.subTest(faixa=faixa):
+                response, conteudo = self.get(Range=faixa)
+                self.assertEqual((response.status_code, conteudo), (200, self.CONTEUDO))
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        response, conteudo = self.get(Range='bytes=0-9', **{'If-Range': etag})
+        self.assertEqual((response.status_code, conteudo), (206, self.CONTEUDO[:10]))
+        # ETag antigo: o arquivo mudou, vai inteiro
+        response, conteudo = self.get(Range='bytes=0-9', **{'If-Range': '"antigo"'})
+        self.assertEqual((response.status_code, conteudo), (200, self.CONTEUDO))
+
+    def test_if_range_por_data(self):
+        modificado = self.get()[0]['Last-Modified']
+        response, _ = self.get(Range='bytes=0-9', **{'If-Range': modificado})
+        self.assertEqual(response.status_code, 206)
+        response, _ = self.get(Range='bytes=0-9', **{'If-Range': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_nao_modificado(self):
+        primeira = self.get()[0]
+        response, conteudo = self.get(**{'If-None-Match': primeira['ETag']})
+        self.assertEqual((response.status_code, conteudo), (304, b''))
+        response, _ = self.get(**{'If-Modified-Since': primeira['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_acesso_do_mentorado_e_de_outro_mentor(self):
+        client = Client()
+        client.cookies['auth_token'] = self.mentorado.token
+        self.assertEqual(client.get(self.url).status_code, 200)
+
+        User.objects.create_user(username='outro', password='123456')
+        client = Client()
+        client.login(username='outro', password='123456')
+        self.assertEqual(client.get(self.url).status_code, 404)
+
+def imagem_png(cor='red', tamanho=(200, 120)):
+    conteudo = BytesIO()
+    Image.new('RGB', tamanho, cor).save(conteudo, 'PNG')
+    return SimpleUploadedFile('foto.png', conteudo.getvalue(), content_type='image/png')
+
+class MiniaturasTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        media = mkdtemp()
+        cls.addClassCleanup(rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        super().setUpClass()
+
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.navigator = Navigators.objects.create(nome='navigator', user=self.mentor)
+
+    def cadastra(self, foto):
+        form = MentoradosCadastroForm(self.mentor, data={'nome': 'mentorado', 'estagio': 'E1', 'navigator': self.navigator.id}, files={'foto': foto})
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.save()
+
+    def miniaturas_existentes(self, nome):
+        return [default_storage.exists(nome_miniatura(nome, tamanho)) for tamanho in TAMANHOS]
+
+    def test_gera_ao_salvar(self):
+        mentorado = self.cadastra(imagem_png())
+        self.assertTrue(mentorado.miniaturas_geradas)
+        self.assertTrue(Mentorados.objects.get(pk=mentorado.pk).miniaturas_geradas)
+        self.assertEqual(self.miniaturas_existentes(mentorado.foto.name), [True] * len(TAMANHOS))
+        with default_storage.open(nome_miniatura(mentorado.foto.name, 48)) as arquivo:
+            self.assertEqual(Image.open(arquivo).size, (48, 48))
+
+    def test_renderizacao_sem_acesso_ao_disco(self):
+        mentorado = Mentorados.objects.get(pk=self.cadastra(imagem_png()).pk)
+        with patch('django.core.files.storage.FileSystemStorage.exists') as exists, patch('mentorados.miniaturas.gera_miniatura') as gera:
+            url = miniatura(mentorado.foto, 32)
+        exists.assert_not_called()
+        gera.assert_not_called()
+        self.assertEqual(url, default_storage.url(nome_miniatura(mentorado.foto.name, 32)))
+
+    def test_troca_de_foto_remove_as_antigas(self):
+        mentorado = Mentorados.objects.get(pk=self.cadastra(imagem_png()).pk)
+        antiga = mentorado.foto.name
+        mentorado.foto = imagem_png('blue')
+        mentorado.save()
+
+        self.assertNotEqual(mentorado.foto.name, antiga)
+        self.assertEqual(self.miniaturas_existentes(antiga), [False] * len(TAMANHOS))
+        self.assertEqual(self.miniaturas_existentes(mentorado.foto.name), [True] * len(TAMANHOS))
+
+    def test_salvar_sem_trocar_a_foto_nao_regera(self):
+        mentorado = Mentorados.objects.get(pk=self.cadastra(imagem_png()).pk)
+        mentorado.nome = 'outro nome'
+        with patch('mentorados.signals.gera_miniaturas') as gera:
+            mentorado.save()
+        gera.assert_not_called()
+
+    def test_exclusao_remove_miniaturas(self):
+        mentorado = self.cadastra(imagem_png())
+        nome = mentorado.foto.name
+        mentorado.delete()
+        self.assertEqual(self.miniaturas_existentes(nome), [False] * len(TAMANHOS))
+
+    def test_sem_foto_e_foto_ilegivel(self):
+        sem_foto = Mentorados.objects.create(nome='sem foto', user=self.mentor)
+        self.assertEqual(miniatura(sem_foto.foto, 32), '')
+
+        ilegivel = Mentorados(nome='ilegivel', user=self.mentor)
+        ilegivel.foto.save('foto.png', ContentFile(b'nao e imagem'), save=False)
+        ilegivel.save()
+        self.assertFalse(ilegivel.miniaturas_geradas)
+        self.assertEqual(miniatura(ilegivel.foto, 32), ilegivel.foto.url)
+        self.assertEqual(self.miniaturas_existentes(ilegivel.foto.name), [False] * len(TAMANHOS))
+
+    def test_comando_gera_as_pendentes(self):
+        mentorado = self.cadastra(imagem_png())
+        # Foto de antes das miniaturas no cadastro
+        Mentorados.objects.filter(pk=mentorado.pk).update(miniaturas_geradas=False)
+        for tamanho in TAMANHOS:
+            default_storage.delete(nome_miniatura(mentorado.foto.name, tamanho))
+
+        saida = StringIO()
+        call_command('gera_miniaturas', stdout=saida)
+        self.assertIn('1 fotos com miniaturas geradas', saida.getvalue())
+        self.assertTrue(Mentorados.objects.get(pk=mentorado.pk).miniaturas_geradas)
+        self.assertEqual(self.miniaturas_existentes(mentorado.foto.name), [True] * len(TAMANHOS))
+
+class TarefasAlterarTest(TestCase):
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        outro = User.objects.create_user(username='outro', password='123456')
+        self.mentorado = Mentorados.objects.create(nome='mentorado', user=self.mentor)
+        self.colega = Mentorados.objects.create(nome='colega', user=self.mentor)
+        de_outro = Mentorados.objects.create(nome='de outro mentor', user=outro)
+        self.tarefas = [Tarefa.objects.create(mentorado=self.mentorado, tarefa=f't{i}') for i in range(3)]
+        self.da_colega = Tarefa.objects.create(mentorado=self.colega, tarefa='da colega')
+        self.de_outro = Tarefa.objects.create(mentorado=de_outro, tarefa='de outro mentor')
+        self.url = reverse('tarefas_alterar')
+
+    def mentor_client(self):
+        client = Client()
+        client.login(username='mentor', password='123456')
+        return client
+
+    def mentorado_client(self, mentorado=None):
+        client = Client()
+        client.cookies['auth_token'] = (mentorado or self.mentorado).token
+        return client
+
+    def envia(self, client, dados):
+        return client.post(self.url, dumps(dados), content_type='application/json')
+
+    def realizadas(self):
+        return set(Tarefa.objects.filter(realizada=True).values_list('id', flat=True))
+
+    def test_mentor_altera_as_de_seus_mentorados(self):
+        ids = [self.tarefas[0].id, self.da_colega.id]
+        response = self.envia(self.mentor_client(), {'ids': ids, 'realizada': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tarefas'], [{'id': id, 'realizada': True} for id in ids])
+        self.assertEqual(self.realizadas(), set(ids))
+
+    def test_mentor_nao_altera_tarefa_de_outro_mentor(self):
+        response = self.envia(self.mentor_client(), {'ids': [self.tarefas[0].id, self.de_outro.id], 'realizada': True})
+        self.assertEqual(response.json()['tarefas'], [{'id': self.tarefas[0].id, 'realizada': True}])
+        self.assertEqual(self.realizadas(), {self.tarefas[0].id})
+
+    def test_mentorado_altera_apenas_as_proprias(self):
+        ids = [self.tarefas[1].id, self.da_colega.id, self.de_outro.id]
+        response = self.envia(self.mentorado_client(), {'ids': ids})
+        self.assertEqual(response.json()['tarefas'], [{'id': self.tarefas[1].id, 'realizada': True}])
+        self.assertEqual(self.realizadas(), {self.tarefas[1].id})
+
+    def test_anonimo_nao_altera(self):
+        response = self.envia(Client(), {'ids': [t.id for t in self.tarefas], 'realizada': True})
+        self.assertEqual(response.json()['tarefas'], [])
+        self.assertEqual(self.realizadas(), set())
+
+    def test_alterna_sem_realizada(self):
+        Tarefa.objects.filter(id=self.tarefas[0].id).update(realizada=True)
+        response = self.envia(self.mentor_client(), {'ids': [self.tarefas[0].id, self.tarefas[1].id]})
+        self.assertEqual(response.json()['tarefas'], [{'id': self.tarefas[0].id, 'realizada': False}, {'id': self.tarefas[1].id, 'realizada': True}])
+
+    def test_formulario(self):
+        response = self.mentor_client().post(self.url, {'ids': [str(self.tarefas[2].id)], 'realizada': 'true'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.realizadas(), {self.tarefas[2].id})
+
+    def test_entrada_malformada(self):
+        client = self.mentor_client()
+        id = self.tarefas[0].id
+        casos = {
+            'json inválido': '{ids: [1]',
+            'lista no corpo': dumps([id]),
+            'sem ids': dumps({'realizada': True}),
+            'ids vazio': dumps({'ids': []}),
+            'ids não é lista': dumps({'ids': id}),
+            'id texto': dumps({'ids': ['abc']}),
+            'id booleano': dumps({'ids': [True]}),
+            'id decimal': dumps({'ids': [1.5]}),
+            'realizada texto': dumps({'ids': [id], 'realizada': 'sim'}),
+            'realizada número': dumps({'ids': [id], 'realizada': 1}),
+        }
+        for nome, corpo in casos.items():
+            with self.subTest(caso=nome):
+                response = client.post(self.url, corpo, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('erro', response.json())
+        self.assertEqual(self.realizadas(), set())
+
+    def test_csrf_exigido(self):
+        client = Client(enforce_csrf_checks=True)
+        client.login(username='mentor', password='123456')
+        self.assertEqual(self.envia(client, {'ids': [self.tarefas[0].id]}).status_code, 403)
+        # O legado também deixou de ser csrf_exempt
+        self.assertEqual(client.post(reverse('tarefa_alterar', kwargs={'id': self.tarefas[0].id})).status_code, 403)
+        self.assertEqual(self.realizadas(), set())
+
+    def test_fluxo_com_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.login(username='mentor', password='123456')
+        client.get(reverse('tarefa', kwargs={'id': self.mentorado.id}))
+        token = client.cookies['csrftoken'].value
+        response = client.post(self.url, dumps({'ids': [self.tarefas[0].id]}), content_type='application/json', headers={'X-CSRFToken': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.realizadas(), {self.tarefas[0].id})
+
+    def test_fluxo_com_csrf_do_mentorado(self):
+        client = Client(enforce_csrf_checks=True)
+        client.cookies['auth_token'] = self.mentorado.token
+        client.get(reverse('tarefa_mentorado'))
+        token = client.cookies['csrftoken'].value
+        response = client.post(self.url, {'ids': [self.tarefas[0].id, self.da_colega.id]}, headers={'X-CSRFToken': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.realizadas(), {self.tarefas[0].id})
+
+class ImportacaoTest(TestCase):
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.navigator = Navigators.objects.create(nome='Ana Nav', user=self.mentor)
+        self.client.login(username='mentor', password='123456')
+
+    def importa(self, conteudo, formato='csv', lote=1000):
+        importador = ImportadorMentorados(self.mentor, tamanho_lote=lote)
+        arquivo = TextIOWrapper(BytesIO(conteudo), encoding='utf-8-sig', newline='')
+        return importador, importador.importa(le_linhas(arquivo, formato))
+
+    def envia(self, nome, conteudo):
+        response = self.client.post(reverse('importar_mentorados'), {'arquivo': SimpleUploadedFile(nome, conteudo)})
+        self.assertEqual(response.status_code, 302)
+        return [str(m) for m in get_messages(response.wsgi_request)]
+
+    def test_csv(self):
+        conteudo = '\ufeffnome,estagio,navigator\nAna,E2,Ana Nav\nBruno,501-1M,\n,E1,\nCarla,E9,\nDiego,E1,Outro\n'.encode()
+        _, (criados, erros) = self.importa(conteudo)
+        self.assertEqual(criados, 2)
+        self.assertEqual([numero for numero, _ in erros], [4, 5, 6])
+        ana = Mentorados.objects.get(nome='Ana')
+        self.assertEqual((ana.estagio, ana.navigator), ('E2', self.navigator))
+        self.assertEqual(Mentorados.objects.get(nome='Bruno').estagio, 'E3')
+        tokens = list(Mentorados.objects.values_list('token', flat=True))
+        self.assertTrue(all(tokens) and len(set(tokens)) == len(tokens))
+        self.assertEqual(ResumoMentor.objects.get(pk=self.mentor.pk).mentorados, 2)
+
+    def test_ndjson(self):
+        conteudo = b'{"nome": "Ana"}\n\nnao e json\n[1]\n{"nome": "Bruno", "navigator": "%d"}\n' % self.navigator.id
+        _, (criados, erros) = self.importa(conteudo, 'ndjson')
+        self.assertEqual(criados, 2)
+        self.assertEqual([numero for numero, _ in erros], [3, 4])
+        self.assertEqual(Mentorados.objects.get(nome='Bruno').navigator, self.navigator)
+
+    def test_desfaz_protecao_de_formula(self):
+        self.importa(b"nome\n'=1+1\n'Ana\n")
+        self.assertEqual(sorted(Mentorados.objects.values_list('nome', flat=True)), ["'Ana", '=1+1'])
+
+    def test_caractere_nulo(self):
+        _, (criados, erros) = self.importa(b'nome\nAna\x00\nBruno\n')
+        self.assertEqual(criados, 1)
+        self.assertEqual(erros, [(2, 'Nome com caractere nulo.')])
+
+    def test_csv_invalido_mantem_lotes_anteriores(self):
+        conteudo = b'nome\nAna\nBruno\nCarla\n"' + b'x' * (200 * 1024) + b'"\nDiego\n'
+        with self.assertRaises(ArquivoInvalido) as contexto:
+            self.importa(conteudo, lote=2)
+        self.assertEqual(contexto.exception.linha, 5)
+        # Primeiro lote gravado; Carla ficou no lote em aberto
+        self.assertEqual(sorted(Mentorados.objects.values_list('nome', flat=True)), ['Ana', 'Bruno'])
+
+    def test_view_sem_erro_500(self):
+        conteudo = b'nome\nAna\n"' + b'x' * (200 * 1024) + b'"\n'
+        mensagens = self.envia('mentorados.csv', conteudo)
+        self.assertEqual(len(mensagens), 1)
+        self.assertIn('CSV inválido', mensagens[0])
+        self.assertIn('linha 3', mensagens[0])
+
+    def test_view_utf8_invalido(self):
+        mensagens = self.envia('mentorados.csv', 'nome\nJoão\n'.encode('latin-1'))
+        self.assertIn('UTF-8', mensagens[0])
+
+    def test_view(self):
+        mensagens = self.envia('mentorados.ndjson', b'{"nome": "Ana"}\n{"nome": ""}\n')
+        self.assertEqual(mensagens, ['1 mentorados importados.', '1 linhas com erro (linha 2: Nome obrigatório.).'])
+
+    def test_comando(self):
+        pasta = mkdtemp()
+        self.addCleanup(rmtree, pasta, ignore_errors=True)
+        caminho = os.path.join(pasta, 'mentorados.csv')
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(b'nome\nAna\n')
+        saida = StringIO()
+        call_command('importa_mentorados', caminho, usuario='mentor', stdout=saida, stderr=StringIO())
+        self.assertIn('1 mentorados importados', saida.getvalue())
+
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write('nome\nJoão\n'.encode('latin-1'))
+        with self.assertRaisesMessage(CommandError, 'UTF-8'):
+            call_command('importa_mentorados', caminho, usuario='mentor', stdout=StringIO())
+
+class PopulaDadosTest(TestCase):
+    def test_invalida_apenas_os_mentores_criados(self):
+        cache.set('limite:login:ip:10.0.0.1', (0, 0))
+        saida = StringIO()
+        call_command('popula_dados', mentores=2, navigators=1, mentorados=3, horarios=4, reunioes=2, tarefas=1, uploads=1, stdout=saida)
+
+        self.assertEqual(cache.get('limite:login:ip:10.0.0.1'), (0, 0))
+        mentor = User.objects.get(username='seed-0')
+        self.assertEqual(Mentorados.objects.filter(user=mentor).count(), 3)
+        self.assertEqual(ResumoMentor.objects.get(pk=mentor.pk).mentorados, 3)
+        self.assertEqual(ResumoMentor.objects.get(pk=mentor.pk).horarios_agendados, 2)
+
+def consultas_grafico(contexto):
+    return [c['sql'] for c in contexto.captured_queries if 'FROM "mentorados"' in c['sql'] and 'GROUP BY' in c['sql']]
+
+class GraficoEstagiosTest(CacheCompartilhadoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.mentorados = [Mentorados.objects.create(nome=f'm{i}', user=self.mentor, estagio='E1') for i in range(3)]
+        self.client.login(username='mentor', password='123456')
+        self.url = reverse('grafico_estagios') + '?agrupar=dia&dias=30'
+
+    def test_cache_compartilhado_e_304(self):
+        primeira = self.client.get(self.url)
+        self.assertEqual(primeira.json()['qtd_estagio'], [3, 0, 0])
+        with CaptureQueriesContext(connection) as contexto:
+            segunda = self.client.get(self.url)
+        self.assertEqual(consultas_grafico(contexto), [])
+        self.assertEqual(segunda.json(), primeira.json())
+
+        response = self.client.get(self.url, headers={'If-None-Match': primeira['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_alteracao_invalida_o_cache_e_o_etag(self):
+        primeira = self.client.get(self.url)
+        self.mentorados[0].estagio = 'E2'
+        self.mentorados[0].save()
+
+        response = self.client.get(self.url, headers={'If-None-Match': primeira['ETag']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['qtd_estagio'], [2, 1, 0])
+        self.assertEqual(response.json()['series'][1]['qtd'], [1])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'grafico-local'}})
+    def test_sem_cache_compartilhado_le_sempre_o_banco(self):
+        self.client.get(self.url)
+        # Alteração feita por outro worker: o sinal não chega a este processo
+        Mentorados.objects.filter(pk=self.mentorados[0].pk).update(estagio='E3')
+        response = self.client.get(self.url)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(response.json()['qtd_estagio'], [2, 0, 1])
+        self.assertEqual(response.json()['series'][2]['qtd'], [1])
+
+class ResumoTest(TestCase):
+    def setUp(self):
+        self.mentor = User.objects.create_user(username='mentor', password='123456')
+        self.outro = User.objects.create_user(username='outro', password='123456')
+        self.ana = Mentorados.objects.create(nome='Ana', user=self.mentor)
+        self.bruno = Mentorados.objects.create(nome='Bruno', user=self.mentor)
+        amanha = datetime.now() + timedelta(days=1)
+        self.horarios = [DisponibilidadeHorarios.objects.create(mentor=self.mentor, data_inicial=amanha + timedelta(hours=i)) for i in range(3)]
+        self.reuniao = self.agenda(self.ana, self.horarios[0], 'G')
+        self.agenda(self.bruno, self.horarios[1], 'M')
+        self.tarefas = [Tarefa.objects.create(mentorado=self.ana, tarefa=f't{i}', realizada=i == 0) for i in range(3)]
+        Tarefa.objects.create(mentorado=self.bruno, tarefa='tb')
+        self.upload = Upload.objects.create(mentorado=self.ana, video='video/a.mp4')
+
+    def agenda(self, mentorado, horario, tag):
+        form = ReuniaoForm(mentorado, data={'data': horario.id, 'tag': tag, 'descricao': 'Reunião'})
+        self.assertTrue(form.is_valid(), form.errors)
+        return form.save()
+
+    def confere(self):
+        # Linhas mantidas por deltas (ausente = zeros) contra o recálculo do zero
+        for model, campos, calcula, ids in (
+            (ResumoMentor, CAMPOS_MENTOR, calcula_resumos_mentores, list(User.objects.values_list('id', flat=True))),
+            (ResumoMentorado, CAMPOS_MENTORADO, calcula_resumos_mentorados, list(Mentorados.objects.values_list('id', flat=True))),
+        ):
+            existentes = model.objects.in_bulk(ids)
+            for esperado in calcula(ids):
+                atual = existentes.get(esperado.pk, model(pk=esperado.pk))
+                with self.subTest(model=model.__name__, pk=esperado.pk):
+                    self.assertEqual({c: getattr(atual, c) for c in campos}, {c: getattr(esperado, c) for c in campos})
+
+    def test_deltas(self):
+        self.confere()
+        resumo = ResumoMentor.objects.get(pk=self.mentor.pk)
+        self.assertEqual((resumo.mentorados, resumo.horarios, resumo.horarios_agendados), (2, 3, 2))
+        self.assertEqual((resumo.tarefas, resumo.tarefas_realizadas, resumo.uploads, resumo.reunioes_g, resumo.reunioes_m), (4, 1, 1, 1, 1))
+
+    def test_alteracoes(self):
+        altera_tarefas(Tarefa.objects.filter(mentorado__user=self.mentor), [t.id for t in self.tarefas])
+        tarefa = Tarefa.objects.get(pk=self.tarefas[1].pk)
+        tarefa.realizada = False
+        tarefa.save()
+        reuniao = Reuniao.objects.get(pk=self.reuniao.pk)
+        reuniao.tag = 'RH'
+        reuniao.save()
+        horario = DisponibilidadeHorarios.objects.get(pk=self.horarios[2].pk)
+        horario.agendado = True
+        horario.save()
+        self.confere()
+
+    def test_exclusoes(self):
+        Reuniao.objects.get(pk=self.reuniao.pk).delete()
+        Tarefa.objects.get(pk=self.tarefas[0].pk).delete()
+        Upload.objects.get(pk=self.upload.pk).delete()
+        DisponibilidadeHorarios.objects.get(pk=self.horarios[2].pk).delete()
+        # Tarefa usa DO_NOTHING: removidas antes do mentorado
+        Tarefa.objects.filter(mentorado=self.bruno).delete()
+        Mentorados.objects.get(pk=self.bruno.pk).delete()
+        self.confere()
+        self.assertEqual(ResumoMentor.objects.get(pk=self.mentor.pk).mentorados, 1)
+
+    def test_troca_de_dono(self):
+        tarefa = Tarefa.objects.get(pk=self.tarefas[0].pk)
+        tarefa.mentorado = self.bruno
+        tarefa.save()
+        upload = Upload.objects.get(pk=self.upload.pk)
+        upload.mentorado = self.bruno
+        upload.save()
+        reuniao = Reuniao.objects.get(pk=self.reuniao.pk)
+        reuniao.mentorado = self.bruno
+        reuniao.save()
+        self.confere()
+
+        # Horário com reunião e mentorado com tarefas e upload para outro mentor
+        horario = DisponibilidadeHorarios.objects.get(pk=self.horarios[0].pk)
+        horario.mentor = self.outro
+        horario.save()
+        bruno = Mentorados.objects.get(pk=self.bruno.pk)
+        bruno.user = self.outro
+        bruno.save()
+        self.confere()
+
+        resumo = ResumoMentor.objects.get(pk=self.outro.pk)
+        self.assertEqual((resumo.mentorados, resumo.horarios, resumo.horarios_agendados, resumo.reunioes_g), (1, 1, 1, 1))
+        self.assertEqual((resumo.tarefas, resumo.tarefas_realizadas, resumo.uploads), (2, 1, 1))
+        self.assertEqual(ResumoMentor.objects.get(pk=self.mentor.pk).mentorados, 1)
+
+    def test_reconcilia_confere_com_os_deltas(self):
+        antes = {r.pk: [getattr(r, c) for c in CAMPOS_MENTOR] for r in ResumoMentor.objects.all()}
+        totais = reconcilia(tamanho_lote=1)
+        self.assertEqual(totais['divergentes'], 0)
+        self.assertEqual({r.pk: [getattr(r, c) for c in CAMPOS_MENTOR] for r in ResumoMentor.objects.all() if r.pk in antes}, antes)
+
+    def test_reconcilia_corrige_divergencia(self):
+        ResumoMentor.objects.filter(pk=self.mentor.pk).update(tarefas=99)
+        self.assertEqual(reconcilia()['divergentes'], 1)
+        self.confere()
+
+    def test_preenchimento_na_migracao(self):
+        # Banco anterior aos resumos: nenhuma linha, mas já com dados
+        ResumoMentor.objects.all().delete()
+        ResumoMentorado.objects.all().delete()
+        import_module('mentorados.migrations.0015_preenche_resumos').preenche_resumos(apps, None)
+        self.confere()
+
+        Tarefa.objects.create(mentorado=self.ana, tarefa='nova')
+        self.assertEqual(ResumoMentorado.objects.get(pk=self.ana.pk).tarefas, 4)
+        self.confere()
+
+    def test_view(self):
+        self.client.login(username='mentor', password='123456')
+        dados = self.client.get(reverse('resumo')).json()
+        self.assertEqual((dados['mentorados'], dados['tarefas'], dados['uploads']), (2, 4, 1))
+        dados = self.client.get(reverse('resumo_mentorado', kwargs={'id': self.ana.pk})).json()
+        self.assertEqual((dados['tarefas'], dados['tarefas_realizadas']), (3, 1))
+        self.client.login(username='outro', password='123456')
+        self.assertEqual(self.client.get(reverse('resumo_mentorado', kwargs={'id': self.ana.pk})).status_code, 404)
@@ -0,0 +1,160 @@
+import os
+import shutil
+import zlib
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from .models import Upload, UploadParcial
+from .processamento import enfileira
+
+TAMANHO_LEITURA = 64 * 1024
+# Segundos até a reserva de um chunk poder ser retomada por outra requisição
+RESERVA_TIMEOUT = 300
+
+class ChunkInvalido(Exception):
+    pass
+
+class ChunkForaDeOrdem(Exception):
+    pass
+
+def chunk_max():
+    return getattr(settings, 'MENTORADO_UPLOAD_CHUNK_MAX', 8 * 1024 * 1024)
+
+def pasta_parcial():
+    # Fora do MEDIA_ROOT: em DEBUG static() serviria os .part publicamente
+    return getattr(settings, 'MENTORADO_UPLOAD_PARCIAL_DIR', os.path.join(settings.BASE_DIR, 'uploads_parciais'))
+
+def caminho_parcial(parcial):
+    return os.path.join(pasta_parcial(), f'{parcial.id}.part')
+
+def nome_video(parcial):
+    # O id do upload parcial é único: duas finalizações nunca disputam o mesmo nome
+    digest = parcial.id.hex
+    extensao = os.path.splitext(parcial.nome)[1].lower()
+    return f"{Upload._meta.get_field('video').upload_to}/{digest[:2]}/{digest[2:4]}/{digest}{extensao}"
+
+def inicia_upload(mentorado, nome, tamanho):
+    parcial = UploadParcial.objects.create(
+        mentorado=mentorado,
+        nome=default_storage.get_valid_name(os.path.basename(nome)),
+        tamanho=tamanho
+    )
+    caminho = caminho_parcial(parcial)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    open(caminho, 'wb').close()
+    return parcial
+
+def reserva_chunk(parcial, indice):
+    # UPDATE condicional no offset esperado: só uma requisição grava o chunk
+    agora = datetime.now()
+    livre = Q(gravando_desde__isnull=True) | Q(gravando_desde__lt=agora - timedelta(seconds=RESERVA_TIMEOUT))
+    reservado = UploadParcial.objects.filter(
+        livre, id=parcial.id, proximo_chunk=indice, recebido=parcial.recebido
+    ).update(gravando_desde=agora, atualizado_em=agora)
+    return agora if reservado else None
+
+def grava_chunk(parcial, indice, stream, crc_esperado):
+    # Reenvio de um chunk já recebido: nada a fazer
+    if indice < parcial.proximo_chunk:
+        return parcial
+    if indice > parcial.proximo_chunk:
+        raise ChunkForaDeOrdem(f'Chunk esperado: {parcial.proximo_chunk}.')
+
+    reservado_em = reserva_chunk(parcial, indice)
+    if reservado_em is None:
+        parcial.refresh_from_db()
+        if indice < parcial.proximo_chunk:
+            return parcial
+        raise ChunkForaDeOrdem(f'Chunk {indice} em gravação por outra requisição.')
+
+    # Grava direto no disco em blocos, sem manter o chunk em memória
+    gravado = False
+    try:
+        crc_chunk = 0
+        crc_total = parcial.crc32
+        escrito = 0
+        with open(caminho_parcial(parcial), 'r+b') as arquivo:
+            arquivo.seek(parcial.recebido)
+            for bloco in iter(lambda: stream.read(TAMANHO_LEITURA), b''):
+                escrito += len(bloco)
+                if escrito > chunk_max() or parcial.recebido + escrito > parcial.tamanho:
+                    arquivo.truncate(parcial.recebido)
+                    raise ChunkInvalido('Chunk maior que o permitido.')
+                crc_chunk = zlib.crc32(bloco, crc_chunk)
+                crc_total = zlib.crc32(bloco, crc_total)
+                arquivo.write(bloco)
+
+            if not escrito or crc_chunk != crc_esperado:
+                arquivo.truncate(parcial.recebido)
+                raise ChunkInvalido('Checksum do chunk não confere.')
+
+        # Só avança se a reserva ainda é desta requisição
+        gravado = UploadParcial.objects.filter(id=parcial.id, gravando_desde=reservado_em).update(
+            crc32=crc_total,
+            recebido=F('recebido') + escrito,
+            proximo_chunk=F('proximo_chunk') + 1,
+            gravando_desde=None,
+            atualizado_em=datetime.now()
+        )
+        if not gravado:
+            raise ChunkForaDeOrdem(f'Reserva do chunk {indice} expirou.')
+    finally:
+        if not gravado:
+            UploadParcial.objects.filter(id=parcial.id, gravando_desde=reservado_em).update(gravando_desde=None)
+
+    parcial.refresh_from_db()
+    return parcial
+
+def finaliza_upload(parcial_id, crc_esperado):
+    parcial = UploadParcial.objects.select_related('mentorado').get(id=parcial_id)
+    if parcial.recebido != parcial.tamanho or parcial.gravando_desde:
+        raise ChunkInvalido('Upload incompleto.')
+    if parcial.crc32 != crc_esperado:
+        raise ChunkInvalido('Checksum do arquivo não confere.')
+
+    nome = nome_video(parcial)
+    destino = default_storage.path(nome)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    with transaction.atomic():
+        # Exclusão condicional: só uma finalização vence
+        removido, _ = UploadParcial.objects.filter(id=parcial.id, recebido=parcial.tamanho, gravando_desde__isnull=True).delete()
+        if not removido:
+            raise ChunkInvalido('Upload já finalizado.')
+        upload = Upload.objects.create(mentorado=parcial.mentorado, video=nome)
+        enfileira(upload)
+        # Por último: se a troca falhar, a transação desfaz os registros. No
+        # mesmo sistema de arquivos do MEDIA_ROOT é um rename atômico
+        shutil.move(caminho_parcial(parcial), destino)
+    return upload
+
+def expiracao():
+    return getattr(settings, 'MENTORADO_UPLOAD_EXPIRA', 24 * 3600)
+
+def remove_arquivo(caminho):
+    try:
+        os.remove(caminho)
+    except FileNotFoundError:
+        pass
+
+def limpa_uploads_expirados():
+    # Uploads sem atividade há mais que a expiração, e .part sem registro
+    limite = datetime.now() - timedelta(seconds=expiracao())
+    removidos = 0
+    for id in UploadParcial.objects.filter(atualizado_em__lt=limite).values_list('id', flat=True):
+        # Condicional: um chunk pode ter chegado depois da consulta
+        if UploadParcial.objects.filter(id=id, atualizado_em__lt=limite).delete()[0]:
+            remove_arquivo(caminho_parcial(UploadParcial(id=id)))
+            removidos += 1
+
+    pasta = pasta_parcial()
+    if os.path.isdir(pasta):
+        ativos = {str(id) for id in UploadParcial.objects.values_list('id', flat=True)}
+        for arquivo in os.listdir(pasta):
+            caminho = os.path.join(pasta, arquivo)
+            if arquivo.removesuffix('.part') not in ativos and os.path.getmtime(caminho) < limite.timestamp():
+                remove_arquivo(caminho)
+                removidos += 1
+    return removidos
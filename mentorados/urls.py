@@ -3,12 +3,26 @@ from . import views
 
 urlpatterns = [
     path('', views.MentoradosView.as_view(), name='mentorados'),
+    path('busca/', views.BuscaView.as_view(), name='busca'),
+    path('resumo/', views.ResumoView.as_view(), name='resumo'),
+    path('resumo/<int:id>', views.ResumoView.as_view(), name='resumo_mentorado'),
+    path('grafico/', views.GraficoEstagiosView.as_view(), name='grafico_estagios'),
+    path('exportar/<str:tipo>', views.ExportarView.as_view(), name='exportar'),
+    path('importar/', views.ImportarMentoradosView.as_view(), name='importar_mentorados'),
     path('reunioes/', views.ReunioesView.as_view(), name='reunioes'),
+    path('reunioes/recorrente/', views.DisponibilidadeRecorrenteView.as_view(), name='horarios_recorrentes'),
     path('auth/', views.AuthView.as_view(), name="auth_mentorado"),
     path('escolher_dia/', views.EscolherDiaView.as_view(), name='escolher_dia'),
     path('agendar_reuniao/', views.AgendarReuniao.as_view(), name='agendar_reuniao'),
     path('tarefa/<int:id>', views.TarefasView.as_view(), name='tarefa'),
     path('upload/<int:id>', views.UploadView.as_view(), name='upload'),
+    path('upload/<int:id>/iniciar', views.UploadIniciarView.as_view(), name='upload_iniciar'),
+    path('upload/parcial/<uuid:upload_id>', views.UploadParcialView.as_view(), name='upload_parcial'),
+    path('upload/parcial/<uuid:upload_id>/<int:chunk>', views.UploadChunkView.as_view(), name='upload_chunk'),
+    path('upload/parcial/<uuid:upload_id>/finalizar', views.UploadFinalizarView.as_view(), name='upload_finalizar'),
+    path('video/<int:id>', views.VideoView.as_view(), name='video'),
+    path('video/<int:id>/status', views.VideoStatusView.as_view(), name='video_status'),
     path('tarefa_mentorado/', views.TarefaMentoradoView.as_view(), name='tarefa_mentorado'),
-    path('tarefa_alterar/<int:id>', views.TarefaAlterarView.as_view(), name="tarefa_alterar")
+    path('tarefa_alterar/<int:id>', views.TarefaAlterarView.as_view(), name="tarefa_alterar"),
+    path('tarefas_alterar/', views.TarefasAlterarView.as_view(), name='tarefas_alterar')
 ]
\ No newline at end of file
@@ -1,19 +1,34 @@
 from django.views import generic, View
-from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.mixins import LoginRequiredMixin
-from .models import Mentorados, Estagios, DisponibilidadeHorarios, Reuniao, Tarefa, Upload
-from .forms import MentoradosCadastroForm, DisponibilidadeHorarioForm, AuthMentoradoForm, ReuniaoForm, TarefaForm, UploadsForm
+from .models import Mentorados, DisponibilidadeHorarios, Tarefa, Upload, UploadParcial, ResumoMentor, ResumoMentorado
+from .forms import MentoradosCadastroForm, DisponibilidadeHorarioForm, DisponibilidadeRecorrenteForm, AuthMentoradoForm, ReuniaoForm, TarefaForm, UploadsForm, HorarioIndisponivel
 from django.urls import reverse
 from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from asgiref.sync import sync_to_async
+from usuarios.limite import LimiteTentativasMixin
 from django.contrib import messages
-from .auth import valida_token
+from .auth import valor_cookie, sessao_max_age
+from .cache import AGRUPAMENTOS, grafico_estagios, serie_estagios, grafico_alterado_em, ultima_alteracao_grafico, adatas_disponiveis, cache_compartilhado, CacheVersionadoMixin
+from .paginacao import FILTROS, pagina_reunioes
+from .media import serve_arquivo
+from .tarefas import altera_tarefas
+from .busca import busca
+from .resumo import resumo_mentor
+from .exportacao import EXPORTACOES, FORMATOS, linhas, alinhas
+from django.core.handlers.asgi import ASGIRequest
+from .importacao import CODIFICACAO, ArquivoInvalido, ImportadorMentorados, formato_arquivo, le_linhas
+from io import TextIOWrapper
+from .uploads import ChunkInvalido, ChunkForaDeOrdem, chunk_max, inicia_upload, grava_chunk, finaliza_upload
 from json import loads
-from datetime import datetime
+from datetime import date, datetime, time
 from django.utils.timezone import timedelta
-from django.http import Http404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.utils.cache import patch_cache_control
 
-class MentoradosView(LoginRequiredMixin, generic.CreateView):
+class MentoradosView(LoginRequiredMixin, CacheVersionadoMixin, generic.CreateView):
     model = Mentorados
     form_class = MentoradosCadastroForm
     template_name = 'mentorados.html'
@@ -29,24 +44,148 @@ class MentoradosView(LoginRequiredMixin, generic.CreateView):
     
     def get_context_data(self, **kwargs):
         # Contexto mentorados
-        mentorados = Mentorados.objects.filter(user=self.request.user)
+        mentorados = Mentorados.objects.filter(user=self.request.user).select_related('navigator')
         context = super().get_context_data(**kwargs)
         context['mentorados'] = mentorados
+        return context
 
-        # Contexto estágio
-        estagios = [estagio[1] for estagio in Estagios.choices]
-        qtd_estagio = []
-        for i, j in Estagios.choices:
-            x = Mentorados.objects.filter(estagio=i).filter(user=self.request.user).count()
-            qtd_estagio.append(x)
+def parametros_grafico(request):
+    agrupamento = request.GET.get('agrupar')
+    if agrupamento not in AGRUPAMENTOS:
+        agrupamento = None
+    try:
+        dias = min(max(int(request.GET.get('dias', 90)), 1), 730)
+    except ValueError:
+        dias = 90
+    return agrupamento, dias
 
-        context['grafico'] = {
-            'estagios': estagios,
-            'qtd_estagio': qtd_estagio
-        }
+def etag_grafico(request, *args, **kwargs):
+    # Sem consulta ao banco: muda junto com os mentorados do mentor e, pela
+    # janela de dias, com a data. A marca de alteração só é a mesma em todos
+    # os workers com cache compartilhado.
+    if not request.user.is_authenticated or not cache_compartilhado():
+        return None
+    agrupamento, dias = parametros_grafico(request)
+    return f'{request.user.id}-{grafico_alterado_em(request.user.id)}-{agrupamento}-{dias}-{date.today().isoformat()}'
 
-        return context
+def ultima_alteracao(request, *args, **kwargs):
+    if not request.user.is_authenticated or not cache_compartilhado():
+        return None
+    alterado = ultima_alteracao_grafico(request.user.id)
+    agrupamento, _ = parametros_grafico(request)
+    if agrupamento:
+        # A série muda à meia-noite mesmo sem alterações
+        alterado = max(alterado, datetime.combine(date.today(), time()).astimezone(alterado.tzinfo))
+    return alterado
+
+class GraficoEstagiosView(LoginRequiredMixin, View):
+    @method_decorator(condition(etag_func=etag_grafico, last_modified_func=ultima_alteracao))
+    def get(self, request, *args, **kwargs):
+        agrupamento, dias = parametros_grafico(request)
+        dados = dict(grafico_estagios(request.user))
+        if agrupamento:
+            dados.update(serie_estagios(request.user, agrupamento, dias))
+        response = JsonResponse(dados)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
         
+class BuscaView(LoginRequiredMixin, generic.TemplateView):
+    template_name = 'busca.html'
+    paginate_by = 20
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        consulta = self.request.GET.get('q', '').strip()
+        try:
+            pagina = max(int(self.request.GET.get('pagina', 1)), 1)
+        except ValueError:
+            pagina = 1
+
+        resultados, tem_proxima = busca(self.request.user, consulta, pagina, self.paginate_by)
+        context['consulta'] = consulta
+        context['resultados'] = resultados
+        context['pagina'] = pagina
+        context['proxima'] = pagina + 1 if tem_proxima else None
+        context['anterior'] = pagina - 1 if pagina > 1 else None
+        return context
+
+def contadores(resumo):
+    dados = {
+        'reunioes': resumo.reunioes,
+        'tarefas': resumo.tarefas,
+        'tarefas_realizadas': resumo.tarefas_realizadas,
+        'taxa_conclusao': round(resumo.taxa_conclusao, 4),
+        'uploads': resumo.uploads
+    }
+    if isinstance(resumo, ResumoMentor):
+        dados.update({
+            'mentorados': resumo.mentorados,
+            'horarios': resumo.horarios,
+            'horarios_agendados': resumo.horarios_agendados,
+            'utilizacao': round(resumo.utilizacao, 4)
+        })
+    return dados
+
+class ResumoView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        if 'id' not in self.kwargs:
+            return JsonResponse(contadores(resumo_mentor(request.user.id)))
+
+        # Linha ausente: o mentorado ainda não tem contadores ou não é do mentor
+        resumo = ResumoMentorado.objects.filter(pk=self.kwargs['id'], mentorado__user=request.user).first()
+        if resumo is None:
+            if not Mentorados.objects.filter(id=self.kwargs['id'], user=request.user).exists():
+                raise Http404
+            resumo = ResumoMentorado(mentorado_id=self.kwargs['id'])
+        return JsonResponse(contadores(resumo))
+
+class ExportarView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        tipo = self.kwargs.get('tipo')
+        formato = request.GET.get('formato', 'csv')
+        if tipo not in EXPORTACOES or formato not in FORMATOS:
+            raise Http404
+
+        exportacao = EXPORTACOES[tipo]
+        # Gerador assíncrono sob ASGI para o conteúdo não ser acumulado em memória
+        if isinstance(request, ASGIRequest):
+            conteudo = alinhas(exportacao, request.user, formato)
+        else:
+            conteudo = linhas(exportacao, request.user, formato)
+        response = StreamingHttpResponse(conteudo, content_type=FORMATOS[formato])
+        response['Content-Disposition'] = f'attachment; filename="{tipo}.{formato}"'
+        return response
+
+class ImportarMentoradosView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        return redirect('mentorados')
+
+    def post(self, request, *args, **kwargs):
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo:
+            messages.error(request, 'Selecione um arquivo CSV ou NDJSON.')
+            return redirect('mentorados')
+
+        importador = ImportadorMentorados(request.user)
+        linhas = le_linhas(TextIOWrapper(arquivo.file, encoding=CODIFICACAO, newline=''), formato_arquivo(arquivo.name))
+        try:
+            criados, erros = importador.importa(linhas)
+        except ArquivoInvalido as e:
+            # Os lotes anteriores ao erro já foram gravados
+            messages.error(
+                request,
+                f'{e} Leitura interrompida na linha {e.linha}; '
+                f'{importador.criados} mentorados importados até ali.'
+            )
+            return redirect('mentorados')
+
+        messages.success(request, f'{criados} mentorados importados.')
+        if erros:
+            detalhes = '; '.join(f'linha {numero}: {erro}' for numero, erro in erros[:10])
+            messages.error(request, f'{len(erros)} linhas com erro ({detalhes}).')
+        return redirect('mentorados')
+
+# Sem cache de página: a lista de próximas reuniões depende da hora atual
 class ReunioesView(LoginRequiredMixin, generic.CreateView):
     model = DisponibilidadeHorarios
     form_class = DisponibilidadeHorarioForm
@@ -54,8 +193,18 @@ class ReunioesView(LoginRequiredMixin, generic.CreateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        reunioes = Reuniao.objects.filter(data__mentor=self.request.user)
+        filtro = self.request.GET.get('filtro')
+        if filtro not in FILTROS:
+            filtro = 'proximas'
+        reunioes, cursor = pagina_reunioes(
+            self.request.user,
+            filtro=filtro,
+            cursor=self.request.GET.get('cursor')
+        )
         context['reunioes'] = reunioes
+        context['filtro'] = filtro
+        context['cursor'] = cursor
+        context['form_recorrente'] = DisponibilidadeRecorrenteForm(self.request.user)
         return context
 
     def get_form_kwargs(self):
@@ -78,17 +227,61 @@ class ReunioesView(LoginRequiredMixin, generic.CreateView):
         messages.add_message(self.request, messages.constants.SUCCESS, 'Horario disponibilizado com sucesso.')
         return reverse('reunioes')
     
-class AuthView(generic.FormView):
-    form_class = AuthMentoradoForm
-    template_name = 'auth_mentorado.html'
+class DisponibilidadeRecorrenteView(LoginRequiredMixin, generic.FormView):
+    form_class = DisponibilidadeRecorrenteForm
+
+    def get(self, request, *args, **kwargs):
+        return redirect('reunioes')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
 
-    def get_success_url(self):
-        messages.success(self.request, 'Autenticação realizada com sucesso.')
-        return reverse('escolher_dia')
-    
     def form_valid(self, form):
-        response = super().form_valid(form)
-        response.set_cookie('auth_token', form.cleaned_data.get('token'), max_age=3600)
+        horarios = form.save()
+        ignorados = form.total_candidatos - len(horarios)
+        msg = f'{len(horarios)} horarios disponibilizados com sucesso.'
+        if ignorados:
+            msg += f' {ignorados} ignorados por conflito.'
+        messages.success(self.request, msg)
+        return redirect('reunioes')
+
+    def form_invalid(self, form):
+        errors = loads(form.errors.as_json())
+        erro_msg = ''
+        for k, v in errors.items():
+            for valor in v:
+                erro_msg = valor['message']
+        
+        if erro_msg:
+            messages.error(self.request, erro_msg)
+        return redirect('reunioes')
+    
+class AuthView(LimiteTentativasMixin, View):
+    template_name = 'auth_mentorado.html'
+    escopo_limite = 'auth_mentorado'
+
+    def resposta_limite(self, request):
+        return TemplateResponse(request, self.template_name, {'form': AuthMentoradoForm()})
+
+    async def get(self, request, *args, **kwargs):
+        return TemplateResponse(request, self.template_name, {'form': AuthMentoradoForm()})
+
+    async def post(self, request, *args, **kwargs):
+        excedido = self.limite_excedido(request)
+        if excedido:
+            return excedido
+
+        form = AuthMentoradoForm(request.POST)
+        if not await form.ais_valid():
+            # Tokens são aleatórios: o balde é só por IP
+            self.registra_falha(request)
+            return self.form_invalid(form)
+
+        messages.success(request, 'Autenticação realizada com sucesso.')
+        response = redirect('escolher_dia')
+        response.set_cookie('auth_token', valor_cookie(form.mentorado), max_age=sessao_max_age(), httponly=True)
         return response
 
     def form_invalid(self, form):
@@ -100,73 +293,65 @@ class AuthView(generic.FormView):
         
         if erro_msg:
             messages.error(self.request, erro_msg)
-        return super().form_invalid(form)
+        return TemplateResponse(self.request, self.template_name, {'form': form})
     
-class EscolherDiaView(generic.TemplateView):
+class EscolherDiaView(View):
     template_name = 'escolher_dia.html'
 
-    def get(self, request, *args, **kwargs):
-        if not valida_token(request.COOKIES.get('auth_token')):
-            return redirect('auth_mentorado')
-        return super().get(request, *args, **kwargs)
-    
-    def post(self, request, *args, **kwargs):
-        if not valida_token(request.COOKIES.get('auth_token')):
+    async def get(self, request, *args, **kwargs):
+        mentorado = await request.amentorado()
+        if not mentorado:
             return redirect('auth_mentorado')
-        return super().post(request, *args, **kwargs)
-
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
         # Horarios
-        mentorado =  valida_token(self.request.COOKIES.get('auth_token'))
-        disponibilidades = DisponibilidadeHorarios.objects.filter(
-            data_inicial__gte=datetime.now(),
-            agendado=False,
-            mentor=mentorado.user
-        ).values_list('data_inicial', flat=True)
-        datas = [i.date() for i in disponibilidades]
-        context['datas'] = list(set(datas))
-
-        return context
+        datas = await adatas_disponiveis(mentorado.user_id)
+        return TemplateResponse(request, self.template_name, {'datas': datas})
     
-class AgendarReuniao(generic.CreateView):
-    model = Reuniao
-    form_class = ReuniaoForm
+class AgendarReuniao(View):
     template_name = 'agendar_reuniao.html'
 
-    def get(self, request, *args, **kwargs):
-        if not valida_token(request.COOKIES.get('auth_token')):
+    async def get(self, request, *args, **kwargs):
+        mentorado = await request.amentorado()
+        if not mentorado:
             return redirect('auth_mentorado')
-        return super().get(request, *args, **kwargs)
+
+        form = ReuniaoForm(mentorado)
+        horarios = form.fields['data'].queryset
+        if request.GET.get('data'):
+            data = datetime.strptime(request.GET.get('data'), '%d-%m-%Y')
+            horarios = horarios.filter(
+                data_inicial__gte=data,
+                data_inicial__lt=data + timedelta(days=1)
+            )
+
+        # Opções já carregadas: o template não consulta o banco
+        campo = form.fields['data']
+        campo.choices = [(horario.pk, campo.label_from_instance(horario)) async for horario in horarios]
+        # Sem opção vazia o primeiro horário já vem selecionado
+        campo.empty_label = None
+        return TemplateResponse(request, self.template_name, {'form': form})
     
-    def post(self, request, *args, **kwargs):
-        if not valida_token(request.COOKIES.get('auth_token')):
+    async def post(self, request, *args, **kwargs):
+        mentorado = await request.amentorado()
+        if not mentorado:
             return redirect('auth_mentorado')
-        return super().post(request, *args, **kwargs)
 
-    def get_form_kwargs(self):
-        kwargs = super().get_form_kwargs()
-        kwargs['mentorado'] = valida_token(self.request.COOKIES.get('auth_token'))
-        return kwargs
-    
-    def get_form(self, form_class=None):
-        form = super().get_form(form_class)
+        form = ReuniaoForm(mentorado, request.POST)
+        # A reserva depende de transação, que o ORM assíncrono não oferece
+        if not await sync_to_async(self.agenda)(form):
+            return self.form_invalid(form)
 
-        if self.request.method == 'GET' and self.request.GET.get('data'):
-            mentorado = valida_token(self.request.COOKIES.get('auth_token'))
-            data = datetime.strptime(self.request.GET.get('data'), '%d-%m-%Y')
-            horarios = DisponibilidadeHorarios.objects.filter(
-                data_inicial__gte=data,
-                data_inicial__lt=data + timedelta(days=1),
-                agendado=False,
-                mentor=mentorado.user
-            )
-            if horarios:
-                form.fields['data'].initial = horarios[0]
-            form.fields['data'].queryset = horarios
+        messages.add_message(request, messages.constants.SUCCESS, 'Horario agendado com sucesso.')
+        return redirect('escolher_dia')
 
-        return form
+    def agenda(self, form):
+        if not form.is_valid():
+            return False
+        try:
+            form.save()
+        except HorarioIndisponivel as e:
+            form.add_error('data', str(e))
+            return False
+        return True
     
     def form_invalid(self, form):
         errors = loads(form.errors.as_json())
@@ -178,30 +363,29 @@ class AgendarReuniao(generic.CreateView):
         if erro_msg:
             messages.error(self.request, erro_msg)
             print(erro_msg)
-        return super().form_invalid(form)
-    
-    def get_success_url(self):
-        messages.add_message(self.request, messages.constants.SUCCESS, 'Horario agendado com sucesso.')
-        return reverse('escolher_dia')
+        return TemplateResponse(self.request, self.template_name, {'form': form})
     
-class TarefasView(generic.CreateView):
+class TarefasView(CacheVersionadoMixin, generic.CreateView):
     model = Tarefa
     form_class = TarefaForm
     template_name = 'tarefa.html'
     
     def get_mentorado(self):
-        try:
-            return Mentorados.objects.get(id=self.kwargs.get('id'))
-        except:
-            raise Http404
+        # Uma única consulta por requisição
+        if not hasattr(self, '_mentorado'):
+            try:
+                self._mentorado = Mentorados.objects.get(id=self.kwargs.get('id'))
+            except:
+                raise Http404
+        return self._mentorado
 
     def get(self, request, *args, **kwargs):
-        if self.get_mentorado().user != request.user:
+        if self.get_mentorado().user_id != request.user.id:
             raise Http404
         return super().get(request, *args, **kwargs)
     
     def post(self, request, *args, **kwargs):
-        if self.get_mentorado().user != request.user:
+        if self.get_mentorado().user_id != request.user.id:
             raise Http404
         return super().get(request, *args, **kwargs)
     
@@ -215,7 +399,7 @@ class TarefasView(generic.CreateView):
         context['mentorado'] = self.get_mentorado()
         context['form2'] = kwargs.get('form2') or UploadsForm()
         context['tarefas'] = Tarefa.objects.filter(mentorado=self.get_mentorado())
-        context['videos'] = Upload.objects.filter(mentorado=self.get_mentorado())
+        context['videos'] = Upload.objects.filter(mentorado=self.get_mentorado()).select_related('mentorado', 'processamento')
         return context
     
     def get_success_url(self):
@@ -237,28 +421,176 @@ class UploadView(View):
             form.save(self.get_mentorado())
         return redirect(reverse('tarefa', kwargs={'id': self.get_mentorado().id}))
 
-class TarefaMentoradoView(generic.TemplateView):
-    template_name = 'tarefa_mentorado.html'
+class UploadIniciarView(LoginRequiredMixin, View):
+    def get_mentorado(self):
+        try:
+            return Mentorados.objects.get(id=self.kwargs.get('id'), user=self.request.user)
+        except:
+            raise Http404
+
+    def post(self, request, *args, **kwargs):
+        mentorado = self.get_mentorado()
+        try:
+            dados = loads(request.body)
+            nome = str(dados['nome'])
+            tamanho = int(dados['tamanho'])
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse({'erro': 'Informe nome e tamanho do arquivo.'}, status=400)
+        if tamanho <= 0:
+            return JsonResponse({'erro': 'Tamanho inválido.'}, status=400)
+
+        parcial = inicia_upload(mentorado, nome, tamanho)
+        return JsonResponse({
+            'id': str(parcial.id),
+            'url': reverse('upload_parcial', kwargs={'upload_id': parcial.id}),
+            'chunk_max': chunk_max()
+        }, status=201)
 
+class UploadParcialMixin(LoginRequiredMixin):
+    def get_parcial(self):
+        try:
+            return UploadParcial.objects.get(id=self.kwargs.get('upload_id'), mentorado__user=self.request.user)
+        except:
+            raise Http404
+
+    def get_crc(self):
+        try:
+            return int(self.request.headers.get('X-Crc32'))
+        except (TypeError, ValueError):
+            return None
+
+class UploadParcialView(UploadParcialMixin, View):
     def get(self, request, *args, **kwargs):
-        if not valida_token(request.COOKIES.get('auth_token')):
-            return redirect('auth_mentorado')
-        return super().get(request, *args, **kwargs)
-    
+        parcial = self.get_parcial()
+        return JsonResponse({
+            'id': str(parcial.id),
+            'tamanho': parcial.tamanho,
+            'recebido': parcial.recebido,
+            'proximo_chunk': parcial.proximo_chunk,
+            'crc32': parcial.crc32
+        })
+
+class UploadChunkView(UploadParcialMixin, View):
     def post(self, request, *args, **kwargs):
-        if not valida_token(request.COOKIES.get('auth_token')):
+        parcial = self.get_parcial()
+        crc = self.get_crc()
+        if crc is None:
+            return JsonResponse({'erro': 'Cabeçalho X-Crc32 obrigatório.'}, status=400)
+        try:
+            parcial = grava_chunk(parcial, self.kwargs.get('chunk'), request, crc)
+        except ChunkForaDeOrdem as e:
+            return JsonResponse({'erro': str(e), 'proximo_chunk': parcial.proximo_chunk}, status=409)
+        except ChunkInvalido as e:
+            return JsonResponse({'erro': str(e)}, status=400)
+        return JsonResponse({'recebido': parcial.recebido, 'proximo_chunk': parcial.proximo_chunk})
+
+class UploadFinalizarView(UploadParcialMixin, View):
+    def post(self, request, *args, **kwargs):
+        parcial = self.get_parcial()
+        crc = self.get_crc()
+        if crc is None:
+            return JsonResponse({'erro': 'Cabeçalho X-Crc32 obrigatório.'}, status=400)
+        try:
+            upload = finaliza_upload(parcial.id, crc)
+        except ChunkInvalido as e:
+            return JsonResponse({'erro': str(e)}, status=400)
+        return JsonResponse({'id': upload.id, 'video': reverse('video', kwargs={'id': upload.id})}, status=201)
+
+class VideoView(View):
+    def get_upload(self):
+        try:
+            upload = Upload.objects.select_related('mentorado').get(id=self.kwargs.get('id'))
+        except:
+            raise Http404
+
+        # Acesso do mentor dono ou do próprio mentorado
+        request = self.request
+        if request.user.is_authenticated and upload.mentorado.user_id == request.user.id:
+            return upload
+        if request.mentorado and request.mentorado.pk == upload.mentorado_id:
+            return upload
+        raise Http404
+
+    def get(self, request, *args, **kwargs):
+        upload = self.get_upload()
+        try:
+            return serve_arquivo(request, upload.video)
+        except FileNotFoundError:
+            raise Http404
+
+class VideoStatusView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        try:
+            upload = Upload.objects.select_related('processamento').get(id=self.kwargs.get('id'), mentorado__user=request.user)
+        except:
+            raise Http404
+
+        processamento = getattr(upload, 'processamento', None)
+        return JsonResponse({
+            'id': upload.id,
+            'status': processamento.get_status_display() if processamento else None,
+            'erro': processamento.erro if processamento else '',
+            'tamanho': upload.tamanho,
+            'sha256': upload.sha256,
+            'formato': upload.formato,
+            'duracao': upload.duracao
+        })
+
+class TarefaMentoradoView(View):
+    template_name = 'tarefa_mentorado.html'
+
+    async def get(self, request, *args, **kwargs):
+        mentorado = await request.amentorado()
+        if not mentorado:
             return redirect('auth_mentorado')
-        return super().post(request, *args, **kwargs)
-    
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['mentorado'] = valida_token(self.request.COOKIES.get('auth_token'))
-        context['videos'] = Upload.objects.filter(mentorado=context.get('mentorado'))
-        context['tarefas'] = Tarefa.objects.filter(mentorado=context.get('mentorado'))
-        return context
 
-@method_decorator(csrf_exempt, name='dispatch')
-class TarefaAlterarView(View):
+        context = {
+            'mentorado': mentorado,
+            'videos': [video async for video in Upload.objects.filter(mentorado=mentorado).select_related('mentorado')],
+            'tarefas': [tarefa async for tarefa in Tarefa.objects.filter(mentorado=mentorado)]
+        }
+        return TemplateResponse(request, self.template_name, context)
+
+class TarefasDonoMixin:
+    def get_tarefas(self):
+        # Mentor altera tarefas dos seus mentorados; mentorado, apenas as próprias
+        if self.request.user.is_authenticated:
+            return Tarefa.objects.filter(mentorado__user=self.request.user)
+        if self.request.mentorado:
+            return Tarefa.objects.filter(mentorado_id=self.request.mentorado.pk)
+        return Tarefa.objects.none()
+
+class TarefasAlterarView(TarefasDonoMixin, View):
+    def post(self, request, *args, **kwargs):
+        if request.content_type == 'application/json':
+            try:
+                dados = loads(request.body)
+            except ValueError:
+                return JsonResponse({'erro': 'JSON inválido.'}, status=400)
+            if not isinstance(dados, dict):
+                return JsonResponse({'erro': 'O corpo deve ser um objeto JSON.'}, status=400)
+        else:
+            dados = {'ids': request.POST.getlist('ids'), 'realizada': request.POST.get('realizada')}
+
+        # Ausente alterna o valor; no formulário chega como texto
+        realizada = dados.get('realizada')
+        if isinstance(realizada, str):
+            realizada = {'true': True, 'false': False}.get(realizada.lower(), realizada)
+        if realizada is not None and not isinstance(realizada, bool):
+            return JsonResponse({'erro': 'realizada deve ser true ou false.'}, status=400)
+
+        # Inteiros no JSON, dígitos no formulário (bool também é int em Python)
+        ids = dados.get('ids')
+        if not isinstance(ids, list) or not ids or not all(
+            (isinstance(id, int) and not isinstance(id, bool)) or (isinstance(id, str) and id.isdigit())
+            for id in ids
+        ):
+            return JsonResponse({'erro': 'Informe os ids das tarefas.'}, status=400)
+        ids = [int(id) for id in ids]
+
+        return JsonResponse({'tarefas': altera_tarefas(self.get_tarefas(), ids, realizada)})
+
+class TarefaAlterarView(TarefasDonoMixin, View):
     def get_mentorado(self):
         try:
             return Mentorados.objects.get(id=self.kwargs.get('id'))
@@ -269,8 +601,4 @@ class TarefaAlterarView(View):
         return redirect(reverse('tarefa', kwargs={'id': self.get_mentorado().id}))
 
     def post(self, request, *args, **kwargs):
-        tarefa = Tarefa.objects.get(id=self.kwargs.get('id'))  
-        tarefa.realizada = not tarefa.realizada
-        tarefa.save()
-        return redirect(reverse('tarefa', kwargs={'id': self.get_mentorado().id}))
-    
\ No newline at end of file
+        return JsonResponse({'tarefas': altera_tarefas(self.get_tarefas(), [self.kwargs.get('id')])})
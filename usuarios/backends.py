@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+from mentorados.cache import cache_compartilhado
+
+def chave_usuario(user_id):
+    return f'usuarios:user:{user_id}'
+
+def invalida_usuario(user_id):
+    cache.delete(chave_usuario(user_id))
+
+class CacheUserBackend(ModelBackend):
+    # request.user vem do cache; o hash da senha ainda é conferido pelo Django.
+    # Só com cache compartilhado: num cache por processo os outros workers
+    # manteriam o hash antigo após uma troca de senha
+    def get_user(self, user_id):
+        if not cache_compartilhado():
+            return super().get_user(user_id)
+        chave = chave_usuario(user_id)
+        user = cache.get(chave)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(chave, user, timeout=getattr(settings, 'USUARIO_CACHE_TTL', 300))
+        return user
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        # O ModelBackend segue na lista só para as sessões gravadas antes deste
+        # backend (get_user); sem isto um login errado conferiria a senha duas vezes
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            raise PermissionDenied
+        return user
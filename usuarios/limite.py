@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+from time import time
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+LIMITES = {
+    # escopo: (capacidade do balde, fichas repostas por minuto)
+    'ip': (20, 10),
+    'credencial': (5, 2),
+}
+
+class Balde:
+    # Token bucket: cada tentativa que falha consome uma ficha, repostas continuamente
+    def saldo(self, chave, capacidade, por_minuto, agora):
+        fichas, ultimo = self.le(chave) or (capacidade, agora)
+        return min(capacidade, fichas + (agora - ultimo) * por_minuto / 60)
+
+    def espera(self, chave, capacidade, por_minuto):
+        # Segundos até a próxima ficha, sem consumir
+        fichas = self.saldo(chave, capacidade, por_minuto, time())
+        return 0 if fichas >= 1 else (1 - fichas) * 60 / por_minuto
+
+    def consome(self, chave, capacidade, por_minuto):
+        agora = time()
+        fichas = self.saldo(chave, capacidade, por_minuto, agora)
+        self.grava(chave, (max(fichas - 1, 0), agora), capacidade, por_minuto)
+
+    def le(self, chave):
+        raise NotImplementedError
+
+    def grava(self, chave, valor, capacidade, por_minuto):
+        raise NotImplementedError
+
+class BaldeMemoria(Balde):
+    # Um único processo; LRU para não crescer sem limite sob ataque
+    def __init__(self, tamanho=10000):
+        self.tamanho = tamanho
+        self._baldes = OrderedDict()
+        self._lock = Lock()
+
+    def consome(self, chave, capacidade, por_minuto):
+        with self._lock:
+            super().consome(chave, capacidade, por_minuto)
+
+    def le(self, chave):
+        return self._baldes.get(chave)
+
+    def grava(self, chave, valor, capacidade, por_minuto):
+        self._baldes[chave] = valor
+        self._baldes.move_to_end(chave)
+        while len(self._baldes) > self.tamanho:
+            self._baldes.popitem(last=False)
+
+class BaldeCache(Balde):
+    # Compartilhado entre workers; sem atomicidade, disputas podem ceder alguma ficha a mais
+    def le(self, chave):
+        return cache.get(f'limite:{chave}')
+
+    def grava(self, chave, valor, capacidade, por_minuto):
+        # Depois de encher o balde a entrada é desnecessária
+        cache.set(f'limite:{chave}', valor, timeout=int(capacidade * 60 / por_minuto) + 1)
+
+@lru_cache(maxsize=None)
+def balde(caminho):
+    return import_string(caminho)()
+
+def ip_cliente(request):
+    # Atrás de N proxies confiáveis o cliente é o N-ésimo endereço a partir da
+    # direita do X-Forwarded-For: cada proxy acrescenta quem o chamou. Os da
+    # esquerda vêm do próprio cliente e podem ser forjados a cada requisição
+    proxies = getattr(settings, 'LIMITE_PROXIES_CONFIAVEIS', 0)
+    if proxies:
+        enderecos = [e.strip() for e in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if e.strip()]
+        if len(enderecos) >= proxies:
+            return enderecos[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+def baldes(request, escopo, credencial):
+    # Por IP e, com credencial, por credencial + IP: falhas contra um usuário
+    # vindas de outro endereço não bloqueiam o dono da conta
+    ip = ip_cliente(request)
+    chaves = [(f'{escopo}:ip:{ip}', LIMITES['ip'])]
+    if credencial:
+        chaves.append((f'{escopo}:credencial:{credencial}:{ip}', LIMITES['credencial']))
+    return chaves
+
+def backend_limite():
+    return balde(getattr(settings, 'LIMITE_BACKEND', 'usuarios.limite.BaldeMemoria'))
+
+def verifica_limite(request, escopo, credencial):
+    # Retorna os segundos de espera, ou 0 se a tentativa pode seguir
+    backend = backend_limite()
+    return max(backend.espera(chave, *limite) for chave, limite in baldes(request, escopo, credencial))
+
+def registra_falha(request, escopo, credencial):
+    backend = backend_limite()
+    for chave, limite in baldes(request, escopo, credencial):
+        backend.consome(chave, *limite)
+
+class LimiteTentativasMixin:
+    # Recusa o POST antes de validar o formulário (sem hash de senha nem
+    # consulta); só tentativas que falham consomem fichas (registra_falha)
+    escopo_limite = None
+
+    def credencial_limite(self, request):
+        return None
+
+    def limite_excedido(self, request):
+        espera = verifica_limite(request, self.escopo_limite, self.credencial_limite(request))
+        if not espera:
+            return None
+        segundos = int(espera) + 1
+        messages.error(request, f'Muitas tentativas. Tente novamente em {segundos} segundos.')
+        response = self.resposta_limite(request)
+        response.status_code = 429
+        response['Retry-After'] = str(segundos)
+        return response
+
+    def registra_falha(self, request):
+        registra_falha(request, self.escopo_limite, self.credencial_limite(request))
+
+    def resposta_limite(self, request):
+        # Formulário sem dados: renderizar um form preenchido o validaria
+        return self.render_to_response({'form': self.form_class()})
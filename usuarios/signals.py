@@ -0,0 +1,9 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .backends import invalida_usuario
+
+@receiver([post_save, post_delete], sender=User)
+def usuario_alterado(sender, instance, **kwargs):
+    # Troca de senha, last_login, is_active...
+    invalida_usuario(instance.pk)
@@ -1,3 +1,153 @@
-from django.test import TestCase
+from unittest.mock import patch
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from mentorados.tests import CacheCompartilhadoTestCase
+from .backends import chave_usuario
+from .limite import LIMITES, balde, ip_cliente
 
-# Create your tests here.
+def consultas_usuario(contexto):
+    return [c['sql'] for c in contexto.captured_queries if 'FROM "auth_user"' in c['sql']]
+
+class CacheUserBackendTest(CacheCompartilhadoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='mentor', password='123456')
+        self.client.login(username='mentor', password='123456')
+
+    def get(self):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(reverse('mentorados'))
+        self.assertEqual(response.status_code, 200)
+        return consultas_usuario(contexto)
+
+    def test_usuario_vem_do_cache(self):
+        self.assertEqual(len(self.get()), 1)
+        self.assertEqual(cache.get(chave_usuario(self.user.pk)), self.user)
+        self.assertEqual(self.get(), [])
+
+    def test_troca_de_senha_invalida(self):
+        self.get()
+        self.user.set_password('nova-senha')
+        self.user.save()
+        self.assertIsNone(cache.get(chave_usuario(self.user.pk)))
+        # O hash mudou: a sessão antiga deixa de valer
+        response = self.client.get(reverse('mentorados'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'usuarios-local'}})
+    def test_sem_cache_compartilhado_consulta_sempre(self):
+        self.get()
+        self.assertIsNone(cache.get(chave_usuario(self.user.pk)))
+        self.assertEqual(len(self.get()), 1)
+
+    def test_sessao_do_model_backend_continua_valida(self):
+        client = Client()
+        client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(client.get(reverse('mentorados')).status_code, 200)
+
+    def test_login_errado_confere_a_senha_uma_vez(self):
+        with patch.object(User, 'check_password', autospec=True, return_value=False) as check_password:
+            self.assertIsNone(authenticate(username='mentor', password='errada'))
+        check_password.assert_called_once()
+        self.assertEqual(authenticate(username='mentor', password='123456'), self.user)
+
+class LimiteTentativasTest(TestCase):
+    def setUp(self):
+        # Baldes novos a cada teste (BaldeMemoria vive no processo)
+        balde.cache_clear()
+        self.user = User.objects.create_user(username='mentor', password='123456')
+        self.agora = 1_000_000.0
+        relogio = patch('usuarios.limite.time', side_effect=lambda: self.agora)
+        relogio.start()
+        self.addCleanup(relogio.stop)
+
+    def login(self, senha='errada', ip='10.0.0.1', username='mentor'):
+        return Client().post(reverse('login'), {'username': username, 'password': senha}, REMOTE_ADDR=ip)
+
+    def test_429_com_retry_after_apos_as_falhas(self):
+        capacidade, por_minuto = LIMITES['credencial']
+        for _ in range(capacidade):
+            self.assertEqual(self.login().status_code, 200)
+        response = self.login()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], str(int(60 / por_minuto) + 1))
+        # Bloqueia também a senha certa, sem conferi-la
+        with patch.object(User, 'check_password', autospec=True) as check_password:
+            self.assertEqual(self.login('123456').status_code, 429)
+        check_password.assert_not_called()
+
+    def test_fichas_repostas_com_o_tempo(self):
+        capacidade, por_minuto = LIMITES['credencial']
+        for _ in range(capacidade):
+            self.login()
+        self.assertEqual(self.login('123456').status_code, 429)
+        self.agora += 60 / por_minuto
+        self.assertEqual(self.login('123456').status_code, 302)
+
+    def test_login_certo_nao_consome_fichas(self):
+        capacidade, _ = LIMITES['credencial']
+        for _ in range(capacidade * 2):
+            self.assertEqual(self.login('123456').status_code, 302)
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_falhas_de_outro_ip_nao_bloqueiam_o_usuario(self):
+        capacidade, _ = LIMITES['credencial']
+        for _ in range(capacidade + 1):
+            self.login(ip='10.0.0.66')
+        self.assertEqual(self.login(ip='10.0.0.66').status_code, 429)
+        self.assertEqual(self.login('123456', ip='10.0.0.1').status_code, 302)
+
+    def test_limite_por_ip_entre_usuarios(self):
+        capacidade, _ = LIMITES['ip']
+        for i in range(capacidade):
+            self.login(username=f'usuario{i}')
+        self.assertEqual(self.login(username='outro').status_code, 429)
+
+    def test_auth_do_mentorado(self):
+        capacidade, _ = LIMITES['ip']
+        client = Client(REMOTE_ADDR='10.0.0.9')
+        for _ in range(capacidade):
+            self.assertEqual(client.post(reverse('auth_mentorado'), {'token': 'invalido'}).status_code, 200)
+        response = client.post(reverse('auth_mentorado'), {'token': 'invalido'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+class IpClienteTest(TestCase):
+    def request(self, encaminhado=None):
+        meta = {'REMOTE_ADDR': '10.0.0.254'}
+        if encaminhado is not None:
+            meta['HTTP_X_FORWARDED_FOR'] = encaminhado
+        return RequestFactory().get('/', **meta)
+
+    def test_sem_proxies_usa_remote_addr(self):
+        self.assertEqual(ip_cliente(self.request('1.1.1.1')), '10.0.0.254')
+
+    @override_settings(LIMITE_PROXIES_CONFIAVEIS=1)
+    def test_um_proxy(self):
+        self.assertEqual(ip_cliente(self.request('203.0.113.7')), '203.0.113.7')
+        # Endereços acrescentados pelo próprio cliente ficam à esquerda
+        self.assertEqual(ip_cliente(self.request('1.1.1.1, 2.2.2.2, 203.0.113.7')), '203.0.113.7')
+
+    @override_settings(LIMITE_PROXIES_CONFIAVEIS=2)
+    def test_dois_proxies(self):
+        self.assertEqual(ip_cliente(self.request('1.1.1.1, 203.0.113.7, 10.0.0.5')), '203.0.113.7')
+
+    @override_settings(LIMITE_PROXIES_CONFIAVEIS=2)
+    def test_cabecalho_curto_ou_ausente(self):
+        self.assertEqual(ip_cliente(self.request('203.0.113.7')), '10.0.0.254')
+        self.assertEqual(ip_cliente(self.request()), '10.0.0.254')
+
+    @override_settings(LIMITE_PROXIES_CONFIAVEIS=1)
+    def test_forjar_o_cabecalho_nao_troca_de_balde(self):
+        balde.cache_clear()
+        User.objects.create_user(username='mentor', password='123456')
+        capacidade, _ = LIMITES['credencial']
+        for i in range(capacidade):
+            Client().post(reverse('login'), {'username': 'mentor', 'password': 'x'}, HTTP_X_FORWARDED_FOR=f'9.9.9.{i}, 203.0.113.7')
+        response = Client().post(reverse('login'), {'username': 'mentor', 'password': 'x'}, HTTP_X_FORWARDED_FOR='8.8.8.8, 203.0.113.7')
+        self.assertEqual(response.status_code, 429)
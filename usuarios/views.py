@@ -5,6 +5,7 @@ from django.urls import reverse_lazy, reverse
 from django.contrib import messages
 from json import loads
 from django.contrib.auth import login
+from .limite import LimiteTentativasMixin
 
 class CadastroView(generic.CreateView):
     model = User
@@ -29,10 +30,17 @@ class CadastroView(generic.CreateView):
             messages.error(self.request, erro_msg)
         return super().form_invalid(form)
 
-class LoginView(generic.FormView):
+class LoginView(LimiteTentativasMixin, generic.FormView):
     model = User
     form_class = LoginForm
     template_name = 'login.html'
+    escopo_limite = 'login'
+
+    def credencial_limite(self, request):
+        return request.POST.get('username', '').strip().lower()[:150]
+
+    def post(self, request, *args, **kwargs):
+        return self.limite_excedido(request) or super().post(request, *args, **kwargs)
     
     def get_success_url(self):
         messages.success(self.request, 'Login realizado com sucesso.')
@@ -44,6 +52,7 @@ class LoginView(generic.FormView):
         return super().form_valid(form)
 
     def form_invalid(self, form):
+        self.registra_falha(self.request)
         errors = loads(form.errors.as_json())
         erro_msg = ''
         for k, v in errors.items():